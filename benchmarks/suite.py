@@ -0,0 +1,492 @@
+# vim: set et sw=4 sts=4 fileencoding=utf-8:
+#
+# An alternate Python Minecraft library for the Rasperry-Pi
+# Copyright (c) 2013-2016 Dave Jones <dave@waveform.org.uk>
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the copyright holder nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Times the library's hot paths: importing the library, block queries and
+updates against the mock server in :mod:`picraft.testing`, vector generation,
+model parsing and rendering, event polling, and turtle drawing.
+
+Run from the root of the repository::
+
+    $ python benchmarks/suite.py --output results.json
+
+Each benchmark is run once to warm up, then *repeat* times. The minimum and
+median time per operation are reported. Use ``--output`` to write the results
+as JSON. To compare a run against earlier results, use ``--baseline``. The
+script exits with status 1 if any benchmark's minimum is more than
+``--threshold`` slower than the baseline, so it can gate a CI job::
+
+    $ git checkout v1.0 && python benchmarks/suite.py -o base.json
+    $ git checkout master && python benchmarks/suite.py -b base.json
+
+Use ``--filter`` to run only benchmarks whose names contain the given string.
+Use ``--latency`` to add an artificial round-trip delay to every server reply.
+With a latency of a few milliseconds, ``connection.threads_pipelined`` should
+run several times faster than ``connection.threads``, as pipelined requests
+from concurrent threads overlap their round trips.
+"""
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+str = type('')
+
+import io
+import sys
+import json
+import math
+import platform
+import argparse
+import threading
+import subprocess
+from timeit import default_timer as timer
+
+sys.path.insert(0, '.')
+from picraft import (
+    World,
+    Block,
+    Model,
+    Vector,
+    vector_range,
+    line,
+    circle,
+    sphere,
+    filled,
+    O,
+    X,
+    )
+from picraft.turtle import Turtle, TurtleScreen
+from picraft.testing import MockServer
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, ops=1, server=False):
+    """
+    Register the decorated function as a benchmark called *name*. The function
+    performs any setup required and returns a callable which is timed; *ops*
+    is the number of operations that callable performs.
+
+    Server benchmarks run once for each server version. Their name is
+    suffixed with the version in square brackets, and their function receives
+    a connected :class:`~picraft.world.World` and its
+    :class:`~picraft.testing.MockServer`.
+    """
+    def decorator(f):
+        BENCHMARKS.append((name, ops, server, f))
+        return f
+    return decorator
+
+
+# Startup #####################################################################
+
+def bench_startup(code):
+    # Time a fresh interpreter running *code*; this is dominated by the cost
+    # of importing the library
+    def run():
+        subprocess.check_call([sys.executable, '-c', code])
+    return run
+
+
+@benchmark('startup.import', ops=1)
+def bench_startup_import():
+    return bench_startup('import picraft')
+
+
+@benchmark('startup.block_name', ops=1)
+def bench_startup_block_name():
+    return bench_startup('import picraft; picraft.Block("stone").name')
+
+
+# Connection ##################################################################
+
+def bench_threads(world, pipeline, threads=8, calls=50):
+    world.connection.pipeline = pipeline
+    def worker():
+        for i in range(calls):
+            world.connection.transact('world.getPlayerIds()')
+    def run():
+        workers = [threading.Thread(target=worker) for i in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+    return run
+
+
+@benchmark('connection.threads', ops=400, server=True)
+def bench_connection_threads(world, server):
+    return bench_threads(world, False)
+
+
+@benchmark('connection.threads_pipelined', ops=400, server=True)
+def bench_connection_threads_pipelined(world, server):
+    return bench_threads(world, True)
+
+
+# Blocks ######################################################################
+
+@benchmark('blocks.get_single', ops=1000, server=True)
+def bench_get_single(world, server):
+    def run():
+        for i in range(1000):
+            world.blocks[Vector(i, 0, 0)]
+    return run
+
+
+@benchmark('blocks.set_single', ops=1000, server=True)
+def bench_set_single(world, server):
+    stone = Block('stone')
+    def run():
+        for i in range(1000):
+            world.blocks[Vector(i, 0, 0)] = stone
+        world.connection.transact('world.getPlayerIds()')
+    return run
+
+
+@benchmark('blocks.set_single_batch', ops=1000, server=True)
+def bench_set_single_batch(world, server):
+    stone = Block('stone')
+    def run():
+        with world.connection.batch_start():
+            for i in range(1000):
+                world.blocks[Vector(i, 0, 0)] = stone
+        world.connection.transact('world.getPlayerIds()')
+    return run
+
+
+@benchmark('blocks.get_slice', ops=1000, server=True)
+def bench_get_slice(world, server):
+    def run():
+        world.blocks[O:Vector(10, 10, 10)]
+    return run
+
+
+@benchmark('blocks.set_slice_single', ops=1000, server=True)
+def bench_set_slice_single(world, server):
+    stone = Block('stone')
+    def run():
+        world.blocks[O:Vector(10, 10, 10)] = stone
+        world.connection.transact('world.getPlayerIds()')
+    return run
+
+
+@benchmark('blocks.set_slice_many', ops=1000, server=True)
+def bench_set_slice_many(world, server):
+    blocks = [Block('wool', i % 16) for i in range(1000)]
+    def run():
+        world.blocks[O:Vector(10, 10, 10)] = blocks
+        world.connection.transact('world.getPlayerIds()')
+    return run
+
+
+@benchmark('blocks.get_collection', ops=1000, server=True)
+def bench_get_collection(world, server):
+    vectors = [Vector(i, i % 7, i % 13) for i in range(1000)]
+    def run():
+        world.blocks[vectors]
+    return run
+
+
+@benchmark('blocks.get_ids', ops=1000, server=True)
+def bench_get_ids(world, server):
+    vectors = [
+        v for v in vector_range(O, Vector(12, 12, 12))
+        if (v.x + v.y + v.z) % 3
+        ][:1000]
+    def run():
+        world.blocks.get_ids(vectors)
+    return run
+
+
+@benchmark('blocks.set_collection', ops=1000, server=True)
+def bench_set_collection(world, server):
+    vectors = [Vector(i, i % 7, i % 13) for i in range(1000)]
+    stone = Block('stone')
+    def run():
+        world.blocks[vectors] = stone
+        world.connection.transact('world.getPlayerIds()')
+    return run
+
+
+# Vectors #####################################################################
+
+@benchmark('vector_range.iterate', ops=27000)
+def bench_vector_range_iterate():
+    r = vector_range(O, Vector(30, 30, 30))
+    def run():
+        for v in r:
+            pass
+    return run
+
+
+@benchmark('vector_range.index', ops=1000)
+def bench_vector_range_index():
+    r = vector_range(O, Vector(30, 30, 30))
+    vectors = [Vector(i % 30, i % 29, i % 31 % 30) for i in range(1000)]
+    def run():
+        for v in vectors:
+            r.index(v)
+    return run
+
+
+@benchmark('vector.line', ops=100)
+def bench_line():
+    end = Vector(100, 50, 25)
+    def run():
+        for i in range(100):
+            list(line(O, end))
+    return run
+
+
+@benchmark('vector.circle', ops=100)
+def bench_circle():
+    def run():
+        for i in range(100):
+            list(circle(O, 20 * X))
+    return run
+
+
+@benchmark('vector.sphere', ops=10)
+def bench_sphere():
+    def run():
+        for i in range(10):
+            list(sphere(O, 10))
+    return run
+
+
+@benchmark('vector.filled', ops=10)
+def bench_filled():
+    outline = list(circle(O, 20 * X))
+    def run():
+        for i in range(10):
+            list(filled(outline))
+    return run
+
+
+# Models ######################################################################
+
+def uv_sphere_obj(rings=24, segments=48, radius=10.0):
+    """
+    Return the source of an Alias|Wavefront object file describing a UV
+    sphere with the given number of *rings* and *segments*.
+    """
+    lines = ['g sphere', 'usemtl stone']
+    for ring in range(rings + 1):
+        theta = math.pi * ring / rings
+        for segment in range(segments):
+            phi = 2 * math.pi * segment / segments
+            lines.append('v %f %f %f' % (
+                radius * math.sin(theta) * math.cos(phi),
+                radius * math.cos(theta),
+                radius * math.sin(theta) * math.sin(phi)))
+    for ring in range(rings):
+        for segment in range(segments):
+            a = ring * segments + segment + 1
+            b = ring * segments + (segment + 1) % segments + 1
+            lines.append('f %d %d %d %d' % (a, b, b + segments, a + segments))
+    return '\n'.join(lines) + '\n'
+
+
+@benchmark('model.parse', ops=1)
+def bench_model_parse():
+    source = uv_sphere_obj()
+    def run():
+        Model(io.StringIO(source))
+    return run
+
+
+@benchmark('model.render', ops=1)
+def bench_model_render():
+    model = Model(io.StringIO(uv_sphere_obj()))
+    def run():
+        model.render(scale=1.0)
+    return run
+
+
+# Events ######################################################################
+
+def bench_events_poll(players):
+    def setup(world, server):
+        for i in range(players - len(server.world._players)):
+            server.world.add_player('player%d' % i, Vector(i, 0, 0))
+        world.events.track_players = world.players
+        def run():
+            for i in range(100):
+                world.events.poll()
+        return run
+    return setup
+
+for players in (1, 10, 50):
+    benchmark('events.poll_%d' % players, ops=100, server=True)(
+        bench_events_poll(players))
+del players
+
+
+# Turtle ######################################################################
+
+@benchmark('turtle.draw', ops=100, server=True)
+def bench_turtle_draw(world, server):
+    turtle = Turtle(TurtleScreen(world), pos=O)
+    def run():
+        turtle.home()
+        for i in range(100):
+            turtle.forward(i % 20 + 1)
+            turtle.right(73)
+    return run
+
+
+# Runner ######################################################################
+
+def measure(run, ops, repeat):
+    run()
+    times = []
+    for i in range(repeat):
+        start = timer()
+        run()
+        times.append((timer() - start) / ops)
+    times.sort()
+    return {
+        'min': times[0],
+        'median': times[len(times) // 2],
+        'ops': ops,
+        'repeat': repeat,
+        }
+
+
+def run_benchmarks(names, repeat, latency):
+    results = {}
+    for name, ops, server, f in BENCHMARKS:
+        if server:
+            for server_version in ('minecraft-pi', 'raspberry-juice'):
+                full_name = '%s[%s]' % (name, server_version)
+                if names and not any(n in full_name for n in names):
+                    continue
+                with MockServer(
+                        server_version=server_version,
+                        latency=latency) as mock:
+                    world = World(*mock.address)
+                    try:
+                        results[full_name] = measure(
+                            f(world, mock), ops, repeat)
+                    finally:
+                        world.connection.close()
+                report(full_name, results[full_name])
+        elif not names or any(n in name for n in names):
+            results[name] = measure(f(), ops, repeat)
+            report(name, results[name])
+    return results
+
+
+def format_time(t):
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if t * scale >= 1:
+            return '%8.3f%-2s' % (t * scale, unit)
+    return '%8.3f%-2s' % (t * 1e9, 'ns')
+
+
+def report(name, result):
+    print('%-45s %s %s' % (
+        name, format_time(result['min']), format_time(result['median'])))
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print()
+    print('%-45s %10s %10s %8s' % (
+        'benchmark', 'baseline', 'current', 'ratio'))
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old = baseline[name]['min']
+        new = results[name]['min']
+        ratio = new / old if old else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = ' SLOWER'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = ' faster'
+        print('%-45s %s %s %7.2fx%s' % (
+            name, format_time(old), format_time(new), ratio, flag))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark picraft against a local mock server')
+    parser.add_argument(
+        '-o', '--output', metavar='FILE',
+        help='write the results to FILE as JSON')
+    parser.add_argument(
+        '-b', '--baseline', metavar='FILE',
+        help='compare the results to those stored in FILE')
+    parser.add_argument(
+        '-t', '--threshold', type=float, default=0.1,
+        help='the fraction by which a benchmark may be slower than the '
+        'baseline before it counts as a regression (default: %(default)s)')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=5,
+        help='the number of timed runs of each benchmark (default: '
+        '%(default)s)')
+    parser.add_argument(
+        '-f', '--filter', action='append', default=[], metavar='NAME',
+        help='only run benchmarks whose names contain NAME; may be given '
+        'multiple times')
+    parser.add_argument(
+        '-l', '--latency', type=float, default=0.0, metavar='SECS',
+        help='artificial latency added to each server reply (default: '
+        '%(default)s)')
+    config = parser.parse_args(args)
+
+    print('%-45s %10s %10s' % ('benchmark', 'min', 'median'))
+    results = run_benchmarks(config.filter, config.repeat, config.latency)
+    if config.output:
+        with io.open(config.output, 'w', encoding='utf-8') as f:
+            f.write(str(json.dumps({
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'latency': config.latency,
+                'results': results,
+                }, indent=4, sort_keys=True)))
+    if config.baseline:
+        with io.open(config.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, config.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
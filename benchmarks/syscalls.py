@@ -0,0 +1,124 @@
+# vim: set et sw=4 sts=4 fileencoding=utf-8:
+#
+# An alternate Python Minecraft library for the Rasperry-Pi
+# Copyright (c) 2013-2016 Dave Jones <dave@waveform.org.uk>
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the copyright holder nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Measures the number of socket-level system calls (select, send, and recv)
+made by :class:`~picraft.connection.Connection` per ``world.setBlock`` command
+sent outside a batch.
+
+Run from the root of the repository::
+
+    $ python benchmarks/syscalls.py
+"""
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+str = type('')
+
+import sys
+import socket
+import select
+import threading
+from collections import Counter
+
+sys.path.insert(0, '.')
+from picraft import connection as picraft_connection
+
+
+class SinkServer(object):
+    """
+    A minimal server which answers the version probe as Raspberry Juice does
+    and discards everything else.
+    """
+
+    def __init__(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        client, addr = self.listener.accept()
+        for line in client.makefile('rb'):
+            if line.startswith(b'foo('):
+                client.sendall(b'Fail\n')
+            elif line.startswith(b'world.getPlayerIds('):
+                client.sendall(b'1\n')
+
+
+class CountingSocket(object):
+    """
+    Wraps a socket, counting calls to its I/O methods.
+    """
+
+    def __init__(self, sock, counts):
+        self._sock = sock
+        self._counts = counts
+
+    def __getattr__(self, name):
+        attr = getattr(self._sock, name)
+        if name in ('send', 'sendall', 'recv', 'recv_into'):
+            def wrapper(*args, **kwargs):
+                self._counts[name] += 1
+                return attr(*args, **kwargs)
+            return wrapper
+        return attr
+
+
+def main(count=10000):
+    server = SinkServer()
+    conn = picraft_connection.Connection('127.0.0.1', server.port)
+    counts = Counter()
+    conn._socket = CountingSocket(conn._socket, counts)
+    real_select = select.select
+    def counting_select(*args):
+        counts['select'] += 1
+        return real_select(*args)
+    picraft_connection.select.select = counting_select
+    try:
+        for i in range(count):
+            conn.send('world.setBlock(%d,0,0,1,0)' % i)
+    finally:
+        picraft_connection.select.select = real_select
+    total = sum(counts.values())
+    for name, n in sorted(counts.items()):
+        print('%-8s %8d  (%.3f per setBlock)' % (name, n, n / count))
+    print('%-8s %8d  (%.3f per setBlock)' % ('total', total, total / count))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -92,10 +92,12 @@ from .exc import (
     NegativeWeight,
     )
 from .vector import Vector, vector_range, line, lines, circle, sphere, filled, V, O, X, Y, Z
-from .block import Block
+from .block import Block, BlockArray
 from .events import BlockHitEvent, PlayerPosEvent, IdleEvent, ChatPostEvent
-from .connection import Connection
+from .connection import Connection, ConnectionPool, ConnectionMetrics
 from .player import Players, Player, HostPlayer
 from .world import World
+from .cache import WorldCache
 from .render import Model
+from .image import image_to_blocks
 
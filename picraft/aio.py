@@ -0,0 +1,997 @@
+# vim: set et sw=4 sts=4 fileencoding=utf-8:
+#
+# An alternate Python Minecraft library for the Rasperry-Pi
+# Copyright (c) 2013-2016 Dave Jones <dave@waveform.org.uk>
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the copyright holder nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+The aio module defines the :class:`AsyncConnection` and :class:`AsyncWorld`
+classes, which mirror :class:`~picraft.connection.Connection` and
+:class:`~picraft.world.World` on top of :mod:`asyncio` streams. A single event
+loop can drive many server connections at once without dedicating a thread
+(blocked in :func:`select.select`) to each of them.
+
+.. note::
+
+    This module requires Python 3.5 or later. For this reason (and unlike the
+    other modules of the package) its contents are *not* available from the
+    :mod:`picraft` namespace; import them from :mod:`picraft.aio` directly.
+
+Anything which merely transmits commands is unchanged:
+:meth:`AsyncConnection.send` is an ordinary method which queues data for the
+transport, so assigning to :attr:`AsyncWorld.blocks` or to a player's
+:attr:`~AsyncPlayer.pos` works exactly as it does with
+:class:`~picraft.world.World`. Anything which queries
+the server returns an awaitable instead::
+
+    import asyncio
+    from picraft import Vector, Block
+    from picraft.aio import AsyncWorld
+
+    async def main():
+        world = await AsyncWorld.connect()
+        pos = await world.player.tile_pos
+        world.blocks[pos - Vector(y=1)] = Block('stone')
+        print(await world.blocks[pos - Vector(y=1)])
+        world.close()
+
+    asyncio.get_event_loop().run_until_complete(main())
+
+The following items are defined in the module:
+
+
+AsyncConnection
+===============
+
+.. autoclass:: AsyncConnection
+
+
+AsyncWorld
+==========
+
+.. autoclass:: AsyncWorld
+    :members:
+
+
+AsyncPlayers
+============
+
+.. autoclass:: AsyncPlayers
+    :members:
+
+
+AsyncPlayer
+===========
+
+.. autoclass:: AsyncPlayer
+    :members:
+
+
+AsyncHostPlayer
+===============
+
+.. autoclass:: AsyncHostPlayer
+    :members:
+
+
+AsyncEvents
+===========
+
+.. autoclass:: AsyncEvents
+    :members:
+"""
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+str = type('')
+
+
+import asyncio
+import logging
+import socket
+import warnings
+import weakref
+from array import array
+from collections import deque
+
+from .exc import (
+        CommandError,
+        NoResponse,
+        BatchStarted,
+        BatchNotStarted,
+        ConnectionClosed,
+        ConnectionError,
+        EmptySliceWarning,
+        NotSupported,
+        )
+from .connection import (
+        SERVER_VERSIONS,
+        VERSION_PROBE,
+        _read_version_cache,
+        _write_version_cache,
+        _encode_get_block,
+        _encode_get_blocks,
+        _encode_get_height,
+        _encode_get_pos,
+        _parse_int,
+        _UINT16,
+        )
+from .vector import Vector, vector_range
+from .block import Block, Blocks
+from .player import BasePlayer, Player, HostPlayer
+from .events import (
+        Events,
+        BlockHitEvent,
+        ChatPostEvent,
+        PlayerPosEvent,
+        IdleEvent,
+        )
+from .world import WorldHeight, Checkpoint, Camera
+
+logger = logging.getLogger('picraft')
+
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except AttributeError: # Py3.6 and below
+        return asyncio.Task.current_task()
+    except RuntimeError: # no running event loop
+        return None
+
+
+class AsyncConnection(object):
+    """
+    Represents an :mod:`asyncio` connection to the Minecraft server.
+
+    Instances should be constructed with the :meth:`open` coroutine which
+    accepts the same *host*, *port*, *timeout*, *ignore_errors*, *encoding*,
+    *server_version*, and *version_cache* parameters as
+    :class:`~picraft.connection.Connection`::
+
+        >>> conn = await AsyncConnection.open('localhost', 4711)
+        >>> await conn.transact('world.getPlayerIds()')
+        '1'
+
+    A background task reads replies as they arrive and hands them to waiting
+    requests in the order the requests were written, so many requests (from
+    any number of tasks) may be outstanding at once. Lines arriving when no
+    request is outstanding (typically "Fail" responses to commands transmitted
+    with :meth:`send`) are discarded.
+
+    .. automethod:: open
+
+    .. automethod:: close
+
+    .. automethod:: send
+
+    .. automethod:: drain
+
+    .. automethod:: transact
+
+    .. automethod:: transact_many
+
+    .. automethod:: transact_array
+
+    .. automethod:: transact_arrays
+
+    .. automethod:: batch_start
+
+    .. automethod:: batch_send
+
+    .. automethod:: batch_forget
+
+    .. attribute:: ignore_errors
+
+        If ``True`` (the default), requests which receive no reply within
+        :attr:`timeout` return ``None``. If ``False``, they raise
+        :exc:`~picraft.exc.NoResponse`. Commands transmitted with
+        :meth:`send` never wait for a reply.
+
+    .. attribute:: timeout
+
+        The length of time in seconds to wait for a reply while requests are
+        outstanding. Defaults to 1 second.
+
+    .. attribute:: encoding
+
+        The encoding that will be used for messages transmitted to, and
+        received from the server. Defaults to ``'ascii'``.
+
+    .. autoattribute:: server_version
+    """
+
+    # The largest line the reader will accept; world.getBlocks replies for
+    # large regions run to many megabytes
+    _limit = 1 << 28
+
+    def __init__(
+            self, reader, writer, server_version, timeout=1.0,
+            ignore_errors=True, encoding='ascii'):
+        self._reader = reader
+        self._writer = writer
+        self._pending = deque()
+        self._batches = weakref.WeakKeyDictionary()
+        self._directions = {} # temp space for calculated direction
+        self._closed = False
+        self._server_version = server_version
+        self.timeout = timeout
+        self.ignore_errors = ignore_errors
+        self.encoding = encoding
+        self._last_read = asyncio.get_event_loop().time()
+        self._read_task = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def open(
+            cls, host, port, timeout=1.0, ignore_errors=True,
+            encoding='ascii', server_version=None, version_cache=None):
+        """
+        Open a connection to the server at *host* and *port*, determine the
+        server's version and return the new :class:`AsyncConnection`.
+        """
+        if (
+                server_version is not None and
+                server_version not in SERVER_VERSIONS):
+            raise ValueError('invalid server_version: %s' % server_version)
+        cache_key = '%s:%d' % (host, port)
+        if server_version is None and version_cache is not None:
+            server_version = _read_version_cache(version_cache, cache_key)
+        reader, writer = await asyncio.open_connection(
+            host, port, limit=cls._limit)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            # This is effectively an interactive protocol, so disable Nagle's
+            # algorithm for better performance
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if server_version is None:
+            try:
+                server_version = await cls._probe(
+                    reader, writer, timeout, encoding)
+            except:
+                writer.close()
+                raise
+            if version_cache is not None:
+                _write_version_cache(version_cache, cache_key, server_version)
+        return cls(
+            reader, writer, server_version, timeout, ignore_errors, encoding)
+
+    @staticmethod
+    async def _probe(reader, writer, timeout, encoding):
+        # See picraft.connection.VERSION_PROBE for an explanation of this;
+        # it's run before the reader task exists so we read directly
+        writer.write((VERSION_PROBE + '\n').encode(encoding))
+        try:
+            result = await asyncio.wait_for(reader.readline(), timeout)
+            if result == b'Fail\n':
+                await asyncio.wait_for(reader.readline(), timeout)
+                return 'raspberry-juice'
+            elif result.endswith(b'\n'):
+                return 'minecraft-pi'
+            else:
+                raise ConnectionClosed('connection closed by server')
+        except asyncio.TimeoutError:
+            raise NoResponse('no response to version probe')
+
+    def __repr__(self):
+        host, port = self._writer.get_extra_info('peername')[:2]
+        return '<AsyncConnection host="%s", port=%d, server_version="%s">' % (
+                host, port, self._server_version)
+
+    @property
+    def server_version(self):
+        """
+        Returns an object (currently just a string) representing the version
+        of the Minecraft server we're talking to. Presently this is just
+        ``'minecraft-pi'`` or ``'raspberry-juice'``.
+        """
+        return self._server_version
+
+    def close(self):
+        """
+        Closes the connection.
+
+        After this method is called, any further requests will raise a
+        :exc:`~picraft.exc.ConnectionClosed` exception, as will any requests
+        still awaiting a reply.
+        """
+        if not self._closed:
+            self._closed = True
+            self._read_task.cancel()
+            self._writer.close()
+            self._fail_pending()
+
+    def _fail_pending(self):
+        self._closed = True
+        while self._pending:
+            future, sent = self._pending.popleft()
+            if not future.done():
+                future.set_exception(ConnectionClosed('connection closed'))
+
+    async def _read_loop(self):
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                if self._pending:
+                    # A reply is overdue when nothing at all has arrived for
+                    # timeout seconds since the oldest request was written
+                    deadline = max(
+                        self._last_read, self._pending[0][1]) + self.timeout
+                    wait = max(0, deadline - loop.time())
+                else:
+                    deadline = None
+                    wait = self.timeout
+                try:
+                    line = await asyncio.wait_for(
+                        self._reader.readline(), wait)
+                except asyncio.TimeoutError:
+                    if deadline is not None and loop.time() >= deadline:
+                        future, sent = self._pending.popleft()
+                        if not future.done():
+                            if self.ignore_errors:
+                                future.set_result(None)
+                            else:
+                                future.set_exception(
+                                    NoResponse('no response received'))
+                    continue
+                if not line.endswith(b'\n'):
+                    logger.info('connection closed by server')
+                    break
+                self._last_read = loop.time()
+                logger.debug('<: %r', line)
+                if not self._pending:
+                    # Nobody asked for this; most likely a "Fail" in response
+                    # to a command transmitted with send()
+                    continue
+                future, sent = self._pending.popleft()
+                if future.done():
+                    # The requesting task was cancelled
+                    continue
+                line = line.decode(self.encoding).rstrip('\n')
+                if line == 'Fail':
+                    future.set_exception(CommandError('an error occurred'))
+                else:
+                    future.set_result(line)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception('error reading from server')
+        finally:
+            self._fail_pending()
+
+    def _encode(self, buf):
+        if not isinstance(buf, bytes):
+            buf = buf.encode(self.encoding)
+        if not buf.endswith(b'\n'):
+            buf += b'\n'
+        return buf
+
+    def _write(self, buf):
+        if self._closed:
+            raise ConnectionClosed('connection closed')
+        self._writer.write(buf)
+        logger.debug('>: %r', buf)
+
+    def _request(self, buf):
+        self._write(self._encode(buf))
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((future, loop.time()))
+        return future
+
+    def send(self, buf):
+        """
+        Transmits the contents of *buf* to the connected server.
+
+        This is an ordinary method (not a coroutine); the data is queued for
+        transmission by the underlying transport immediately. When sending
+        large quantities of data, await :meth:`drain` periodically to avoid
+        buffering it all in memory.
+
+        If a batch has been initiated by the current task, the contents of
+        *buf* are appended to the batch instead.
+        """
+        try:
+            self._batches[self._batch_key()].extend(self._encode(buf))
+        except KeyError:
+            self._write(self._encode(buf))
+
+    async def drain(self):
+        """
+        Wait until the transport's write buffer has drained sufficiently to
+        permit further transmission.
+        """
+        await self._writer.drain()
+
+    async def transact(self, buf):
+        """
+        Transmits the contents of *buf*, and returns the reply string.
+
+        Other tasks may transmit requests while this coroutine waits for its
+        reply. If the reply is "Fail", :exc:`~picraft.exc.CommandError` is
+        raised.
+        """
+        return await self._request(buf)
+
+    async def transact_many(self, bufs):
+        """
+        Transmits each string in *bufs* in a single transmission, and returns
+        a list of the reply strings.
+        """
+        bufs = list(bufs)
+        if not bufs:
+            return []
+        self._write(b''.join(self._encode(buf) for buf in bufs))
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        futures = [loop.create_future() for buf in bufs]
+        self._pending.extend((future, now) for future in futures)
+        await self._writer.drain()
+        return [await future for future in futures]
+
+    async def transact_array(self, buf):
+        """
+        Transmits the contents of *buf*, and returns the reply (which must be
+        a comma-separated list of integers between 0 and 65535) as an
+        ``array('H')``; see
+        :meth:`~picraft.connection.Connection.transact_array`.
+        """
+        return self._parse_array(await self._request(buf))
+
+    async def transact_arrays(self, bufs):
+        """
+        Transmits each string in *bufs* in a single transmission, and returns
+        a list of the replies as ``array('H')`` instances; see
+        :meth:`~picraft.connection.Connection.transact_arrays`.
+        """
+        return [
+            self._parse_array(result)
+            for result in await self.transact_many(bufs)
+            ]
+
+    @staticmethod
+    def _parse_array(result):
+        ids = array(_UINT16)
+        if result:
+            ids.extend(map(_parse_int, result.split(',')))
+        return ids
+
+    def _batch_key(self):
+        task = _current_task()
+        return self if task is None else task
+
+    def batch_start(self):
+        """
+        Starts a new batch transmission for the current task.
+
+        All subsequent calls to :meth:`send` from the current task will append
+        data to the batch instead of transmitting it. Batches are per-task
+        in the same way that :class:`~picraft.connection.Connection` batches
+        are per-thread. This method can be used as a context manager.
+        """
+        key = self._batch_key()
+        if key in self._batches:
+            raise BatchStarted('batch already started')
+        self._batches[key] = bytearray()
+        return self
+
+    def batch_send(self):
+        """
+        Transmits the current task's batch as a single transmission.
+        """
+        try:
+            batch = self._batches.pop(self._batch_key())
+        except KeyError:
+            raise BatchNotStarted('no batch in progress')
+        if batch:
+            self._write(batch)
+
+    def batch_forget(self):
+        """
+        Terminates the current task's batch without sending anything.
+        """
+        try:
+            del self._batches[self._batch_key()]
+        except KeyError:
+            raise BatchNotStarted('no batch in progress')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is None:
+            self.batch_send()
+        else:
+            self.batch_forget()
+
+
+class AsyncBlocks(Blocks):
+    """
+    This class implements the :attr:`~AsyncWorld.blocks` attribute.
+
+    Assignment behaves exactly as it does for :class:`~picraft.block.Blocks`.
+    Indexing returns an awaitable of the result, as does :meth:`get_ids`.
+
+    .. automethod:: get_ids
+    """
+
+    def __repr__(self):
+        return '<AsyncBlocks>'
+
+    def __getitem__(self, index):
+        return self._get(index)
+
+    async def _get(self, index):
+        if isinstance(index, slice):
+            index = vector_range(index.start, index.stop, index.step)
+        if isinstance(index, vector_range):
+            vrange = index
+            if not vrange:
+                warnings.warn(EmptySliceWarning(
+                    "ignoring empty slice passed to blocks"))
+            elif (
+                    vrange.step == Vector(1, 1, 1) and
+                    vrange.order == 'zxy' and
+                    self._connection.server_version == 'raspberry-juice'):
+                return self._from_ids(
+                    vrange, await self._connection.transact_array(
+                        _encode_get_blocks(
+                            vrange.start.x, vrange.start.y, vrange.start.z,
+                            vrange.stop.x - vrange.step.x,
+                            vrange.stop.y - vrange.step.y,
+                            vrange.stop.z - vrange.step.z)))
+            else:
+                return await self._get_block_loop(vrange)
+        else:
+            try:
+                index.x, index.y, index.z
+            except AttributeError:
+                return await self._get_block_loop(index)
+            else:
+                return Block.from_string(
+                    await self._connection.transact(
+                        _encode_get_block(index.x, index.y, index.z)))
+
+    async def get_ids(self, vectors):
+        """
+        Returns a list of the block ids at each of *vectors*; see
+        :meth:`~picraft.block.Blocks.get_ids`.
+        """
+        if self._connection.server_version != 'raspberry-juice':
+            return [
+                Block.from_string(s).id
+                for s in await self._connection.transact_many(
+                    _encode_get_block(v.x, v.y, v.z) for v in vectors)
+                ]
+        boxes, singles = self._plan_points(vectors)
+        result = [None] * (len(singles) + sum(len(m) for _, _, m in boxes))
+        for (start, stop, members), ids in zip(
+                boxes, await self._connection.transact_arrays(
+                    _encode_get_blocks(*(start + stop))
+                    for start, stop, members in boxes)):
+            self._pick_points(result, start, stop, members, ids)
+        for (i, p), s in zip(singles, await self._connection.transact_many(
+                _encode_get_block(*p) for i, p in singles)):
+            result[i] = Block.from_string(s).id
+        return result
+
+    async def _get_block_loop(self, vrange):
+        return self._from_strings(
+            vrange, await self._connection.transact_many(
+                _encode_get_block(v.x, v.y, v.z)
+                for v in vrange))
+
+
+class AsyncWorldHeight(WorldHeight):
+    """
+    This class implements the :attr:`~AsyncWorld.height` attribute.
+    Indexing returns an awaitable of the result.
+    """
+
+    def __repr__(self):
+        return '<AsyncWorldHeight>'
+
+    def __getitem__(self, index):
+        return self._get(index)
+
+    async def _get(self, index):
+        if isinstance(index, slice):
+            vrange = vector_range(index.start, index.stop)
+            return [
+                Vector(v.x, int(y), v.z)
+                for v, y in zip(vrange, await self._connection.transact_many(
+                    _encode_get_height(v.x, v.z)
+                    for v in vrange))
+                ]
+        else:
+            return Vector(index.x, int(await self._connection.transact(
+                _encode_get_height(index.x, index.z))), index.z)
+
+
+class AsyncPlayerMixin(object):
+    """
+    Replaces the queries of :class:`~picraft.player.BasePlayer` with
+    coroutines; setters are inherited unchanged.
+    """
+
+    async def _get_pos(self):
+        return Vector.from_string(
+            await self._connection.transact(
+                _encode_get_pos(self._player_id)), type=float)
+    pos = property(_get_pos, BasePlayer._set_pos, doc="""\
+        The precise position of the player within the world (awaitable).
+        """)
+
+    async def _get_tile_pos(self):
+        return Vector.from_string(
+            await self._connection.transact(self._cmd('getTile')))
+    tile_pos = property(_get_tile_pos, BasePlayer._set_tile_pos, doc="""\
+        The position of the player within the world to the nearest block
+        (awaitable).
+        """)
+
+    @property
+    async def heading(self):
+        """
+        The direction the player is facing in clockwise degrees from South
+        (awaitable). See :attr:`picraft.player.Player.heading`.
+        """
+        if self._connection.server_version == 'raspberry-juice':
+            return float(
+                await self._connection.transact(self._cmd('getRotation')))
+        else:
+            return BasePlayer.heading.fget(self)
+
+    @property
+    async def pitch(self):
+        """
+        The elevation of the player's view in degrees from the horizontal
+        (awaitable). See :attr:`picraft.player.Player.pitch`.
+        """
+        if self._connection.server_version != 'raspberry-juice':
+            raise NotSupported(
+                'cannot query pitch on server version: %s' %
+                self._connection.server_version)
+        return float(
+            await self._connection.transact(self._cmd('getPitch')))
+
+    @property
+    async def direction(self):
+        """
+        The direction the player is facing as a unit vector (awaitable). See
+        :attr:`picraft.player.Player.direction`.
+        """
+        if self._connection.server_version == 'raspberry-juice':
+            return Vector.from_string(
+                await self._connection.transact(self._cmd('getDirection')),
+                type=float)
+        else:
+            return BasePlayer.direction.fget(self)
+
+
+class AsyncPlayer(AsyncPlayerMixin, Player):
+    """
+    Represents a player within the game world; queries are awaitable.
+    """
+
+    def __repr__(self):
+        return '<AsyncPlayer player_id=%d>' % self._player_id
+
+
+class AsyncHostPlayer(AsyncPlayerMixin, HostPlayer):
+    """
+    Represents the host player within the game world; queries are awaitable.
+    """
+
+    def __repr__(self):
+        return '<AsyncHostPlayer>'
+
+
+class AsyncPlayers(object):
+    """
+    This class implements the :attr:`~AsyncWorld.players` attribute.
+
+    As a mapping cannot be queried asynchronously, use :meth:`refresh` to
+    obtain a :class:`dict` of the players currently in the world, or
+    :meth:`get` to look up a single player::
+
+        >>> players = await world.players.refresh()
+        >>> players
+        {1: <AsyncPlayer player_id=1>}
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cache = {}
+
+    def __repr__(self):
+        return '<AsyncPlayers keys={%s}>' % (
+            ', '.join(str(i) for i in self._cache))
+
+    async def refresh(self):
+        """
+        Query the server for the current players and return a :class:`dict`
+        mapping player ids to :class:`AsyncPlayer` instances.
+        """
+        ids = await self._connection.transact('world.getPlayerIds()')
+        self._cache = {
+            pid: self._cache.get(pid, AsyncPlayer(self._connection, pid))
+            for pid in (int(i) for i in ids.split('|') if i)
+            }
+        return dict(self._cache)
+
+    async def get(self, key):
+        """
+        Return the :class:`AsyncPlayer` with id *key*. On the Raspberry Juice
+        platform, *key* may also be a player name. Raises :exc:`KeyError` if
+        no such player exists.
+        """
+        players = await self.refresh()
+        try:
+            return players[key]
+        except KeyError as e:
+            if self._connection.server_version == 'raspberry-juice':
+                try:
+                    key = int(await self._connection.transact(
+                        'world.getPlayerId(%s)' % key))
+                except ConnectionError:
+                    pass
+                else:
+                    return players[key]
+            raise e
+
+
+class AsyncEvents(Events):
+    """
+    This class implements the :attr:`~AsyncWorld.events` attribute.
+
+    Handlers are registered with the same decorators as
+    :class:`~picraft.events.Events`. Handlers may be ordinary functions or
+    coroutine functions; the latter are scheduled as tasks (and therefore
+    should not also request *thread*). :meth:`poll`, :meth:`process`, and
+    :meth:`main_loop` are coroutines.
+
+    Assigning to :attr:`track_players` doesn't query the server; the first
+    call to :meth:`poll` records the starting positions of newly tracked
+    players and generates no events for them.
+    """
+
+    def __init__(self, connection, poll_gap=0.1, include_idle=False):
+        super(AsyncEvents, self).__init__(connection, poll_gap, include_idle)
+
+    def __repr__(self):
+        return '<AsyncEvents>'
+
+    def _set_track_players(self, value):
+        try:
+            pids = set(value)
+        except TypeError:
+            if not isinstance(value, int):
+                raise ValueError(
+                        'track_players value must be a player id '
+                        'or a sequence of player ids')
+            pids = {value}
+        self._track_players = {pid: None for pid in pids}
+        if self._connection.server_version != 'raspberry-juice':
+            # Filter out calculated directions for untracked players
+            self._connection._directions = {
+                pid: delta
+                for (pid, delta) in self._connection._directions.items()
+                if pid in self._track_players
+                }
+    track_players = property(
+        Events._get_track_players, _set_track_players,
+        doc=Events.track_players.__doc__)
+
+    def _call_handler(self, f, event):
+        result = f(event)
+        if asyncio.iscoroutine(result):
+            asyncio.ensure_future(result)
+
+    async def poll(self):
+        """
+        Return a list of all events that have occurred since the last call to
+        :meth:`poll`.
+        """
+        players = [
+            AsyncPlayer(self._connection, pid) for pid in self._track_players]
+        requests = [_encode_get_pos(pid) for pid in self._track_players]
+        requests.append(b'events.block.hits()\n')
+        if self._connection.server_version == 'raspberry-juice':
+            requests.append(b'events.chat.posts()\n')
+        replies = await self._connection.transact_many(requests)
+
+        events = []
+        for player, s in zip(players, replies):
+            pid = player.player_id
+            old_pos = self._track_players[pid]
+            new_pos = Vector.from_string(s, type=float).round(1)
+            if old_pos is not None and old_pos != new_pos:
+                if self._connection.server_version != 'raspberry-juice':
+                    self._connection._directions[pid] = new_pos - old_pos
+                events.append(PlayerPosEvent(old_pos, new_pos, player))
+            self._track_players[pid] = new_pos
+        for cls, s in zip(
+                (BlockHitEvent, ChatPostEvent), replies[len(players):]):
+            if s:
+                for e in s.split('|'):
+                    event = cls.from_string(self._connection, e)
+                    events.append(event._replace(player=AsyncPlayer(
+                        self._connection, event.player.player_id)))
+
+        if events:
+            return events
+        elif self._include_idle:
+            return [IdleEvent()]
+        else:
+            return []
+
+    async def main_loop(self):
+        """
+        Starts the event polling loop when using the decorator style of event
+        handling. See :meth:`picraft.events.Events.main_loop`.
+        """
+        logger.info('Entering event loop')
+        try:
+            while True:
+                await self.process()
+                await asyncio.sleep(self.poll_gap)
+        except ConnectionClosed:
+            logger.info('Connection closed; exiting event loop')
+
+    async def process(self):
+        """
+        Poll the server for events and call any relevant event handlers.
+        """
+        for event in await self.poll():
+            for handler in self._handlers:
+                if handler.matches(event):
+                    handler.execute(event)
+
+
+class AsyncWorld(object):
+    """
+    Represents a Minecraft world accessed via an :class:`AsyncConnection`.
+
+    Construct instances with the :meth:`connect` coroutine which accepts the
+    same parameters as :class:`~picraft.world.World`. The instance may also
+    be used as an asynchronous context manager which closes the connection on
+    exit::
+
+        >>> async with await AsyncWorld.connect() as world:
+        ...     world.say('Hello, world!')
+        ...     print(await world.height[Vector()])
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._player = AsyncHostPlayer(connection)
+        self._players = AsyncPlayers(connection)
+        self._blocks = AsyncBlocks(connection)
+        self._height = AsyncWorldHeight(connection)
+        self._checkpoint = Checkpoint(connection)
+        self._camera = Camera(connection)
+        self._events = AsyncEvents(connection)
+
+    @classmethod
+    async def connect(
+            cls, host='localhost', port=4711, timeout=1.0,
+            ignore_errors=True, server_version=None, version_cache=None):
+        """
+        Connect to the server at *host* and *port* and return a new
+        :class:`AsyncWorld`.
+        """
+        return cls(await AsyncConnection.open(
+            host, port, timeout, ignore_errors,
+            server_version=server_version, version_cache=version_cache))
+
+    def __repr__(self):
+        return '<AsyncWorld>'
+
+    @property
+    def connection(self):
+        """
+        The :class:`AsyncConnection` to the Minecraft server.
+        """
+        return self._connection
+
+    @property
+    def players(self):
+        """
+        The :class:`AsyncPlayers` object representing all player entities in
+        the world.
+        """
+        return self._players
+
+    @property
+    def player(self):
+        """
+        The :class:`AsyncHostPlayer` representing the host player.
+        """
+        return self._player
+
+    @property
+    def height(self):
+        """
+        Represents the height of the Minecraft world; see
+        :attr:`picraft.world.World.height`. Indexing returns an awaitable.
+        """
+        return self._height
+
+    @property
+    def blocks(self):
+        """
+        Represents the state of blocks in the Minecraft world; see
+        :attr:`picraft.world.World.blocks`. Indexing returns an awaitable,
+        while assignment is unchanged.
+        """
+        return self._blocks
+
+    @property
+    def events(self):
+        """
+        The :class:`AsyncEvents` object which polls events that occur in the
+        Minecraft world.
+        """
+        return self._events
+
+    @property
+    def checkpoint(self):
+        """
+        Represents the Minecraft world checkpoint system; see
+        :attr:`picraft.world.World.checkpoint`.
+        """
+        return self._checkpoint
+
+    @property
+    def camera(self):
+        """
+        Represents the camera of the Minecraft world; see
+        :attr:`picraft.world.World.camera`.
+        """
+        return self._camera
+
+    def say(self, message):
+        """
+        Displays *message* in the game's chat console.
+        """
+        for line in message.splitlines():
+            self.connection.send('chat.post(%s)' % line)
+
+    def close(self):
+        """
+        Closes the connection to the server.
+        """
+        self.connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb):
+        self.close()
@@ -0,0 +1,362 @@
+# vim: set et sw=4 sts=4 fileencoding=utf-8:
+#
+# An alternate Python Minecraft library for the Rasperry-Pi
+# Copyright (c) 2013-2016 Dave Jones <dave@waveform.org.uk>
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the copyright holder nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+The cache module defines the :class:`WorldCache` class, which provides a
+client-side mirror of the blocks in the Minecraft world with write-behind
+caching.
+
+.. note::
+
+    All items in this module are available from the :mod:`picraft` namespace
+    without having to import :mod:`picraft.cache` directly.
+
+The following items are defined in the module:
+
+
+WorldCache
+==========
+
+.. autoclass:: WorldCache
+"""
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+str = type('')
+
+
+import warnings
+from array import array
+from collections import defaultdict
+from itertools import repeat
+from threading import Lock
+
+from .exc import EmptySliceWarning
+from .connection import (
+    _encode_set_block,
+    _encode_set_blocks,
+    _UINT16,
+    _UINT8,
+    )
+from .block import Block, BlockArray, _merge_points
+from .vector import vector_range
+
+
+# Each chunk of the cache covers a 16x16x16 cube of the world
+_CHUNK_BITS = 4
+_CHUNK_SIZE = 1 << _CHUNK_BITS
+_CHUNK_MASK = _CHUNK_SIZE - 1
+_CHUNK_LEN = _CHUNK_SIZE ** 3
+
+
+class _Chunk(object):
+    # The ids and data arrays hold the cached state of the chunk's blocks,
+    # known flags which of those are valid, and orig maps the offset of each
+    # dirty block to the state it had before it was first written (or None if
+    # that state was never known)
+    __slots__ = ('ids', 'data', 'known', 'orig')
+
+    def __init__(self):
+        self.ids = array(_UINT16, [0]) * _CHUNK_LEN
+        self.data = array(_UINT8, [0]) * _CHUNK_LEN
+        self.known = bytearray(_CHUNK_LEN)
+        self.orig = {}
+
+
+def _locate(x, y, z):
+    # Return the key of the chunk containing (x, y, z) and the offset of the
+    # position within that chunk
+    return (
+        (x >> _CHUNK_BITS, y >> _CHUNK_BITS, z >> _CHUNK_BITS),
+        ((y & _CHUNK_MASK) << (_CHUNK_BITS * 2)) |
+        ((x & _CHUNK_MASK) << _CHUNK_BITS) |
+        (z & _CHUNK_MASK)
+        )
+
+
+def _position(key, offset):
+    # The inverse of _locate
+    cx, cy, cz = key
+    return (
+        (cx << _CHUNK_BITS) | ((offset >> _CHUNK_BITS) & _CHUNK_MASK),
+        (cy << _CHUNK_BITS) | (offset >> (_CHUNK_BITS * 2)),
+        (cz << _CHUNK_BITS) | (offset & _CHUNK_MASK),
+        )
+
+
+class WorldCache(object):
+    """
+    A client-side mirror of the blocks in the Minecraft *world* with
+    write-behind caching.
+
+    The cache can be indexed in exactly the same manner as
+    :attr:`~picraft.world.World.blocks`: with a single
+    :class:`~picraft.vector.Vector`, a slice or
+    :class:`~picraft.vector.vector_range`, or an arbitrary collection of
+    vectors. Blocks are fetched from the server the first time they are read
+    and served locally thereafter. Blocks that are written are recorded as
+    dirty but not transmitted until :meth:`flush` is called, at which point
+    writes that didn't alter a block's known state are dropped and the
+    remainder are merged into as few ``setBlocks`` commands as possible::
+
+        >>> from picraft import *
+        >>> world = World()
+        >>> cache = WorldCache(world)
+        >>> cache[Vector(0, -1, 0)]
+        <Block "grass" id=2 data=0>
+        >>> cache[Vector(0, -1, 0):Vector(10, 0, 10)] = Block('stone')
+        >>> cache[Vector(0, -1, 0)]
+        <Block "stone" id=1 data=0>
+        >>> cache.dirty
+        100
+        >>> cache.flush()
+
+    The cache may also be used as a context manager, in which case
+    :meth:`flush` is called when the ``with`` statement ends, unless it ends
+    with an exception in which case :meth:`discard` is called instead::
+
+        >>> with WorldCache(world) as cache:
+        ...     for v in cache[Vector(-10, -1, -10):Vector(11, 0, 11)]:
+        ...         pass
+
+    Cached state is stored sparsely in 16x16x16 chunks of typed arrays, using
+    four bytes per block in each chunk that has been read or written. Note that
+    the cache has no way of knowing about changes made to the world by other
+    scripts or by players; call :meth:`invalidate` to forget the cached state
+    of the world (dirty blocks are retained). Methods of the cache are
+    thread-safe.
+
+    .. automethod:: flush
+
+    .. automethod:: discard
+
+    .. automethod:: invalidate
+
+    .. autoattribute:: world
+
+    .. autoattribute:: dirty
+    """
+
+    def __init__(self, world):
+        self._world = world
+        self._lock = Lock()
+        self._chunks = {}
+
+    def __repr__(self):
+        return '<WorldCache chunks=%d dirty=%d>' % (
+            len(self._chunks), self.dirty)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+    @property
+    def world(self):
+        """
+        The :class:`~picraft.world.World` that the cache mirrors.
+        """
+        return self._world
+
+    @property
+    def dirty(self):
+        """
+        The number of blocks which have been written to the cache but not yet
+        flushed to the world.
+        """
+        with self._lock:
+            return sum(len(chunk.orig) for chunk in self._chunks.values())
+
+    def _get(self, x, y, z):
+        # Return the cached (id, data) at (x, y, z), or None if unknown
+        key, offset = _locate(x, y, z)
+        chunk = self._chunks.get(key)
+        if chunk is not None and chunk.known[offset]:
+            return chunk.ids[offset], chunk.data[offset]
+        return None
+
+    def _store(self, x, y, z, id_, data_):
+        # Record the state of (x, y, z) as read from the world, unless the
+        # position already has a known (and possibly dirty) state
+        key, offset = _locate(x, y, z)
+        try:
+            chunk = self._chunks[key]
+        except KeyError:
+            chunk = self._chunks[key] = _Chunk()
+        if not chunk.known[offset]:
+            chunk.ids[offset] = id_
+            chunk.data[offset] = data_
+            chunk.known[offset] = 1
+
+    def _write(self, x, y, z, id_, data_):
+        key, offset = _locate(x, y, z)
+        try:
+            chunk = self._chunks[key]
+        except KeyError:
+            chunk = self._chunks[key] = _Chunk()
+        if offset not in chunk.orig:
+            if chunk.known[offset]:
+                chunk.orig[offset] = (chunk.ids[offset], chunk.data[offset])
+            else:
+                chunk.orig[offset] = None
+        chunk.ids[offset] = id_
+        chunk.data[offset] = data_
+        chunk.known[offset] = 1
+
+    def _fetch(self, vectors):
+        # Ensure all *vectors* are cached, querying the world for any unknown
+        # ones. These are always queried as a collection (with
+        # getBlockWithData) as flush relies on knowing the data of each block,
+        # which getBlocks doesn't report
+        unknown = [
+            v for v in vectors
+            if self._get(int(v.x), int(v.y), int(v.z)) is None
+            ]
+        if unknown:
+            for v, b in zip(unknown, self._world.blocks[unknown]):
+                self._store(int(v.x), int(v.y), int(v.z), b.id, b.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            index = vector_range(index.start, index.stop, index.step)
+        if isinstance(index, vector_range):
+            if not index:
+                warnings.warn(EmptySliceWarning(
+                    "ignoring empty slice passed to blocks"))
+                return
+            vectors = index
+        else:
+            try:
+                index.x, index.y, index.z
+            except AttributeError:
+                vectors = list(index)
+            else:
+                with self._lock:
+                    self._fetch([index])
+                    return Block.from_id(
+                        *self._get(int(index.x), int(index.y), int(index.z)))
+        with self._lock:
+            self._fetch(vectors)
+            return [
+                Block.from_id(*self._get(int(v.x), int(v.y), int(v.z)))
+                for v in vectors
+                ]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            index = vector_range(index.start, index.stop, index.step)
+        if isinstance(index, vector_range) and not index:
+            warnings.warn(EmptySliceWarning(
+                "ignoring empty slice passed to blocks"))
+            return
+        try:
+            index.x, index.y, index.z
+        except AttributeError:
+            # A range or collection of vectors
+            try:
+                value.id, value.data
+            except AttributeError:
+                if (
+                        not isinstance(value, BlockArray) and
+                        hasattr(value, '__array_interface__')):
+                    # A NumPy array of block ids
+                    value = BlockArray.from_numpy(index, value)
+                writes = zip(index, value)
+            else:
+                writes = zip(index, repeat(value))
+        else:
+            writes = ((index, value),)
+        with self._lock:
+            for v, b in writes:
+                self._write(int(v.x), int(v.y), int(v.z), b.id, b.data)
+
+    def flush(self):
+        """
+        Transmit all dirty blocks to the world. Blocks whose state after
+        writing is the same as their known state before writing are skipped,
+        and the remainder are merged into cuboids of identical blocks, each of
+        which is set with a single command.
+        """
+        with self._lock:
+            changes = defaultdict(list)
+            for key, chunk in self._chunks.items():
+                for offset, orig in chunk.orig.items():
+                    state = (chunk.ids[offset], chunk.data[offset])
+                    if state != orig:
+                        changes[state].append(_position(key, offset))
+                chunk.orig.clear()
+            send = self._world.connection.send
+            for (id_, data_), points in changes.items():
+                for v, w in _merge_points(points):
+                    if v is w:
+                        send(_encode_set_block(
+                            v[0], v[1], v[2], id_, data_))
+                    else:
+                        send(_encode_set_blocks(
+                            v[0], v[1], v[2], w[0], w[1], w[2], id_, data_))
+
+    def discard(self):
+        """
+        Forget all dirty blocks without transmitting them to the world,
+        restoring the cache to its state prior to the writes.
+        """
+        with self._lock:
+            for chunk in self._chunks.values():
+                for offset, orig in chunk.orig.items():
+                    if orig is None:
+                        chunk.known[offset] = 0
+                    else:
+                        chunk.ids[offset], chunk.data[offset] = orig
+                chunk.orig.clear()
+
+    def invalidate(self):
+        """
+        Forget the cached state of all blocks, except those that are dirty,
+        so that subsequent reads are fetched from the world again.
+        """
+        with self._lock:
+            for key, chunk in list(self._chunks.items()):
+                if chunk.orig:
+                    chunk.known[:] = bytearray(_CHUNK_LEN)
+                    for offset in chunk.orig:
+                        chunk.known[offset] = 1
+                else:
+                    del self._chunks[key]
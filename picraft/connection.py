@@ -45,6 +45,26 @@ Connection
 ==========
 
 .. autoclass:: Connection
+
+
+ConnectionPool
+==============
+
+.. autoclass:: ConnectionPool
+
+
+ConnectionMetrics
+=================
+
+.. autoclass:: ConnectionMetrics
+    :members:
+
+
+Reply
+=====
+
+.. autoclass:: Reply
+    :members:
 """
 
 from __future__ import (
@@ -56,10 +76,23 @@ from __future__ import (
 str = type('')
 
 
+import io
+import os
+import sys
 import socket
 import logging
 import select
 import threading
+from array import array
+from bisect import bisect_left
+from collections import deque, Counter
+from itertools import islice, count
+from time import sleep
+try:
+    from time import monotonic
+except ImportError:
+    # Py2 compat
+    from time import time as monotonic
 
 from .exc import (
         CommandError,
@@ -72,6 +105,493 @@ from .exc import (
 logger = logging.getLogger('picraft')
 
 
+SERVER_VERSIONS = ('minecraft-pi', 'raspberry-juice')
+
+# Sadly, nobody seems to have thought about implementing an explicit means of
+# determining the server version (a connection message, a getVersion() call,
+# etc.) so we're relying on observed differences in implementation here.
+# Raspberry Juice answers unknown commands with "Fail" while Minecraft Pi
+# ignores them entirely, so we follow an unknown command with one every
+# server answers; the first line of the response tells us which server we're
+# talking to without having to wait for a timeout
+VERSION_PROBE = 'foo()\nworld.getPlayerIds()'
+
+
+def _read_version_cache(filename, key):
+    """
+    Return the server version stored against *key* in the cache *filename*, or
+    ``None`` if the cache doesn't exist or holds no valid entry for *key*.
+    """
+    # Imported here as the version cache is rarely used and json is
+    # relatively costly to import
+    import json
+    try:
+        with io.open(filename, 'r', encoding='utf-8') as f:
+            version = json.load(f).get(key)
+    except (IOError, OSError, ValueError, AttributeError):
+        return None
+    if version in SERVER_VERSIONS:
+        return version
+
+
+def _write_version_cache(filename, key, version):
+    """
+    Store *version* against *key* in the cache *filename*. The cache is
+    re-written atomically as other processes may be reading it concurrently.
+    Failures are logged but otherwise ignored.
+    """
+    import json
+    import tempfile
+    try:
+        try:
+            with io.open(filename, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if not isinstance(cache, dict):
+                raise ValueError('invalid cache')
+        except (IOError, OSError, ValueError):
+            cache = {}
+        cache[key] = version
+        fd, temp_name = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            with io.open(fd, 'w', encoding='utf-8') as f:
+                f.write(str(json.dumps(cache)))
+            try:
+                os.replace(temp_name, filename)
+            except AttributeError: # Py2 compat
+                os.rename(temp_name, filename)
+        except:
+            os.unlink(temp_name)
+            raise
+    except (IOError, OSError) as e:
+        logger.warning('unable to write version cache %s: %s', filename, e)
+
+
+class Reply(object):
+    """
+    Represents a reply that is expected from the server.
+
+    Instances of this class are returned by :meth:`Connection.transact_async`
+    (and created internally for every other request that expects a reply).
+    They behave much like a :class:`concurrent.futures.Future`. Replies are
+    always read in the order their requests were written (the protocol
+    provides no other means of matching a reply to its request), but the
+    :meth:`result` of any given reply can be requested at any time; all prior
+    replies will be read (and stored in their respective instances) first.
+    """
+
+    __slots__ = ('_connection', '_done', '_value', '_error', '_command',
+                 '_sent', '_request')
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._done = False
+        self._value = None
+        self._error = None
+        # Only used when the connection's metrics are enabled
+        self._command = None
+        self._sent = None
+        # Only used when the connection may reconnect
+        self._request = None
+
+    def __repr__(self):
+        if not self._done:
+            return '<Reply pending>'
+        elif self._error is not None:
+            return '<Reply error=%r>' % self._error
+        else:
+            return '<Reply value=%r>' % self._value
+
+    def _set_result(self, value):
+        self._value = value
+        self._done = True
+
+    def _set_error(self, error):
+        self._error = error
+        self._done = True
+
+    def done(self):
+        """
+        Returns ``True`` if the reply has been read from the server (or the
+        attempt to read it has failed).
+        """
+        return self._done
+
+    def result(self):
+        """
+        Returns the reply string, reading it (and any replies preceding it)
+        from the server if necessary. If the reply was "Fail", a
+        :exc:`~picraft.exc.CommandError` is raised. If no reply arrived within
+        the connection's :attr:`~Connection.timeout`, the result depends on
+        :attr:`~Connection.ignore_errors` (as described in
+        :meth:`Connection.transact`).
+        """
+        if not self._done:
+            self._connection._wait(self)
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class _ArrayReply(Reply):
+    """
+    A :class:`Reply` whose response is a comma-separated list of integers,
+    which is parsed into an :class:`~array.array` as it arrives.
+    """
+
+    __slots__ = ()
+
+
+class _IntCache(dict):
+    """
+    Maps the (encoded) decimal representations of integers to their values.
+    The same few block ids make up the bulk of any large ``world.getBlocks``
+    response, so looking each one up is cheaper than parsing it.
+    """
+
+    def __missing__(self, key):
+        value = self[key] = int(key)
+        return value
+
+_parse_int = _IntCache().__getitem__
+
+# The typecodes of block id and data arrays; Python 2's array demands a
+# byte-string
+_UINT16 = b'H' if sys.version_info[0] == 2 else 'H'
+_UINT8 = b'B' if sys.version_info[0] == 2 else 'B'
+
+
+class _Batch(object):
+    """
+    Internal object holding the encoded commands of a thread's batch, along
+    with the thresholds at which the batch is flushed automatically.
+    """
+
+    __slots__ = ('data', 'count', 'started', 'max_commands', 'max_bytes',
+                 'max_delay')
+
+    def __init__(self, max_commands=None, max_bytes=None, max_delay=None):
+        self.data = bytearray()
+        self.count = 0
+        self.started = monotonic()
+        self.max_commands = max_commands
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+
+    def full(self):
+        return (
+            (self.max_commands is not None and
+                self.count >= self.max_commands) or
+            (self.max_bytes is not None and
+                len(self.data) >= self.max_bytes) or
+            (self.max_delay is not None and
+                monotonic() - self.started >= self.max_delay)
+            )
+
+
+def _command_encoder(template):
+    """
+    Return a function which formats its integer arguments into the byte-string
+    *template*, returning the encoded command complete with its terminating
+    newline. This avoids formatting a unicode string, appending the newline,
+    and encoding the result (the usual route of a command to the socket) for
+    the commands sent in the largest quantities.
+    """
+    template += b'\n'
+    try:
+        template % ((0,) * template.count(b'%'))
+    except TypeError:
+        # Python 3 prior to 3.5 cannot %-format byte-strings
+        text = template.decode('ascii')
+        def encode(*args):
+            return (text % args).encode('ascii')
+    else:
+        def encode(*args):
+            return template % args
+    return encode
+
+_encode_set_block = _command_encoder(
+    b'world.setBlock(%d,%d,%d,%d,%d)')
+_encode_set_blocks = _command_encoder(
+    b'world.setBlocks(%d,%d,%d,%d,%d,%d,%d,%d)')
+_encode_get_block = _command_encoder(
+    b'world.getBlockWithData(%d,%d,%d)')
+_encode_get_blocks = _command_encoder(
+    b'world.getBlocks(%d,%d,%d,%d,%d,%d)')
+_encode_get_height = _command_encoder(
+    b'world.getHeight(%d,%d)')
+_encode_get_entity_pos = _command_encoder(
+    b'entity.getPos(%d)')
+_GET_PLAYER_POS = b'player.getPos()\n'
+
+
+def _encode_get_pos(player_id):
+    """
+    Return the encoded ``getPos`` command for the player with *player_id*, or
+    for the host player if *player_id* is ``None``.
+    """
+    if player_id is None:
+        return _GET_PLAYER_POS
+    return _encode_get_entity_pos(player_id)
+
+
+def _command_name(buf):
+    """
+    Return the name of the command in *buf* (the portion preceding the opening
+    parenthesis, e.g. ``'world.setBlock'``). *buf* may be a unicode string or
+    an encoded byte-string.
+    """
+    if isinstance(buf, bytes):
+        i = buf.find(b'(')
+        return (buf if i < 0 else buf[:i]).decode('ascii')
+    i = buf.find('(')
+    return buf if i < 0 else buf[:i]
+
+
+def _replayable(buf):
+    """
+    Returns ``True`` if the request in *buf* may safely be repeated on a new
+    connection. This is the case for queries (``get...`` commands) and for
+    event queries (a new connection starts with empty event queues anyway).
+    """
+    name = _command_name(buf)
+    return (
+        name.startswith('events.') or
+        name.rsplit('.', 1)[-1].startswith('get'))
+
+
+class _Disconnected(Exception):
+    """
+    Internal exception raised when a reader discovers the connection has been
+    lost and it should be re-established by :meth:`Connection._recover`.
+    """
+
+    def __init__(self, generation):
+        super(_Disconnected, self).__init__(generation)
+        self.generation = generation
+
+
+class ConnectionMetrics(object):
+    """
+    Collects statistics about the traffic on one or more connections.
+
+    Assign an instance to :attr:`Connection.metrics` (or
+    :attr:`ConnectionPool.metrics`) to start collecting; assign ``None`` to
+    stop. While a connection's :attr:`~Connection.metrics` is ``None`` (the
+    default) the only overhead is the check for it. For example::
+
+        >>> metrics = ConnectionMetrics()
+        >>> world.connection.metrics = metrics
+        >>> world.blocks[Vector(0, 0, 0)]
+        <Block "grass" id=2 data=0>
+        >>> metrics.snapshot()['transacts']
+        1
+
+    The following counters are maintained as attributes:
+
+    .. attribute:: sends
+
+        The number of commands passed to :meth:`~Connection.send`.
+
+    .. attribute:: transacts
+
+        The number of requests made which expect a reply (via
+        :meth:`~Connection.transact` and its variants).
+
+    .. attribute:: commands
+
+        A :class:`~collections.Counter` of the commands sent or requested,
+        keyed by command name (e.g. ``'world.setBlock'``).
+
+    .. attribute:: writes
+
+        The number of transmissions made to the socket.
+
+    .. attribute:: bytes_sent
+
+        The number of bytes transmitted.
+
+    .. attribute:: bytes_received
+
+        The number of bytes received.
+
+    .. attribute:: batches
+
+        The number of (non-empty) batch transmissions, including those
+        triggered by the thresholds of :meth:`~Connection.batch_start`.
+
+    .. attribute:: batch_commands
+
+        The total number of commands in all batch transmissions.
+
+    .. attribute:: lock_waits
+
+        The number of times a thread acquired the connection.
+
+    .. attribute:: lock_wait_time
+
+        The total time in seconds that threads spent waiting to acquire the
+        connection.
+
+    In addition, a histogram of the sizes of batch transmissions, and a
+    histogram of the latency of each command (from the request being written
+    to the reply being read) are kept; these are included in the result of
+    :meth:`snapshot`.
+
+    Finally, *callback* may be a callable which is invoked for every event
+    recorded, with the event type, the command name (or ``None``), and a value.
+    The event types and values are:
+
+    * ``'send'``: the value is ``None``
+    * ``'transact'``: the value is the latency in seconds
+    * ``'batch'``: the value is the number of commands transmitted
+    * ``'lock'``: the value is the time in seconds spent waiting
+
+    The callback is called from whichever thread triggered the event, and
+    should return quickly.
+    """
+
+    #: The upper bounds (in seconds) of the latency histogram buckets; a final
+    #: bucket counts everything above the last bound
+    latency_buckets = (
+        0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+        0.1, 0.25, 0.5, 1.0)
+
+    #: The upper bounds (in commands) of the batch size histogram buckets; a
+    #: final bucket counts everything above the last bound
+    batch_buckets = (1, 10, 100, 1000, 10000)
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Reset all counters and histograms to zero.
+        """
+        with self._lock:
+            self.sends = 0
+            self.transacts = 0
+            self.commands = Counter()
+            self.writes = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.batches = 0
+            self.batch_commands = 0
+            self.lock_waits = 0
+            self.lock_wait_time = 0.0
+            self._batch_sizes = [0] * (len(self.batch_buckets) + 1)
+            self._latency = {}
+
+    def snapshot(self):
+        """
+        Return the current statistics as a :class:`dict` (suitable for
+        serializing as JSON). The ``'latency'`` key maps each command name to
+        a dict with ``'count'``, ``'total'``, ``'min'``, and ``'max'`` keys
+        (all times in seconds), and a ``'buckets'`` list of counts matching
+        :attr:`latency_buckets`. The ``'batch_sizes'`` key maps to a list of
+        counts matching :attr:`batch_buckets`.
+        """
+        with self._lock:
+            return {
+                'sends': self.sends,
+                'transacts': self.transacts,
+                'commands': dict(self.commands),
+                'writes': self.writes,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'batches': self.batches,
+                'batch_commands': self.batch_commands,
+                'batch_sizes': list(self._batch_sizes),
+                'lock_waits': self.lock_waits,
+                'lock_wait_time': self.lock_wait_time,
+                'latency': {
+                    command: {
+                        'count': stats[0],
+                        'total': stats[1],
+                        'min': stats[2],
+                        'max': stats[3],
+                        'buckets': list(stats[4]),
+                        }
+                    for command, stats in self._latency.items()
+                    },
+                }
+
+    def _send(self, command):
+        with self._lock:
+            self.sends += 1
+            self.commands[command] += 1
+        if self.callback is not None:
+            self.callback('send', command, None)
+
+    def _transact(self, command):
+        with self._lock:
+            self.transacts += 1
+            self.commands[command] += 1
+
+    def _reply(self, command, latency):
+        with self._lock:
+            try:
+                stats = self._latency[command]
+            except KeyError:
+                stats = self._latency[command] = [
+                    0, 0.0, latency, latency,
+                    [0] * (len(self.latency_buckets) + 1)]
+            stats[0] += 1
+            stats[1] += latency
+            stats[2] = min(stats[2], latency)
+            stats[3] = max(stats[3], latency)
+            stats[4][bisect_left(self.latency_buckets, latency)] += 1
+        if self.callback is not None:
+            self.callback('transact', command, latency)
+
+    def _write(self, size):
+        with self._lock:
+            self.writes += 1
+            self.bytes_sent += size
+
+    def _read(self, size):
+        with self._lock:
+            self.bytes_received += size
+
+    def _batch(self, count):
+        with self._lock:
+            self.batches += 1
+            self.batch_commands += count
+            self._batch_sizes[bisect_left(self.batch_buckets, count)] += 1
+        if self.callback is not None:
+            self.callback('batch', None, count)
+
+    def _lock_wait(self, wait):
+        with self._lock:
+            self.lock_waits += 1
+            self.lock_wait_time += wait
+        if self.callback is not None:
+            self.callback('lock', None, wait)
+
+
+class _TimedLock(object):
+    """
+    Context manager which acquires *lock*, recording the time spent waiting
+    for it in *metrics*.
+    """
+
+    __slots__ = ('_lock', '_metrics')
+
+    def __init__(self, lock, metrics):
+        self._lock = lock
+        self._metrics = metrics
+
+    def __enter__(self):
+        start = monotonic()
+        self._lock.acquire()
+        self._metrics._lock_wait(monotonic() - start)
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self._lock.release()
+
+
 class Connection(object):
     """
     Represents the connection to the Minecraft server.
@@ -87,6 +607,32 @@ class Connection(object):
     default), act like the mcpi implementation and ignore all errors for
     commands which do not return data.
 
+    If *pipeline* is ``True`` (it defaults to ``False``), calls to
+    :meth:`transact` from multiple threads will not wait for each other's
+    replies; see :attr:`pipeline` for more information. If *coalesce* is a
+    number of seconds (it defaults to ``None``), commands sent outside a batch
+    are held back for up to that long to be combined into fewer
+    transmissions; see :attr:`coalesce` for more information. If *metrics* is
+    a :class:`ConnectionMetrics` instance, statistics about the connection's
+    traffic are recorded in it; see :attr:`metrics`. If *reconnect* is a
+    number of seconds (it defaults to ``None``), a lost connection is
+    re-established automatically; see :attr:`reconnect`.
+
+    The version of the server (see :attr:`server_version`) is determined when
+    the connection is made, at the cost of one round trip. This can be
+    avoided by specifying *server_version* explicitly (as ``'minecraft-pi'``
+    or ``'raspberry-juice'``). Alternatively, *version_cache* can specify the
+    filename of a cache in which the versions of servers are recorded (by
+    host and port) and shared between processes::
+
+        >>> Connection('localhost', 4711, version_cache='/tmp/picraft.cache')
+        <Connection host="127.0.0.1", port=4711, server_version="raspberry-juice">
+
+    .. warning::
+
+        The cache is never expired. If a different type of server is later
+        run on the same host and port, delete the cache file.
+
     Users will rarely need to construct a :class:`Connection` object
     themselves. An instance of this class is constructed by
     :class:`~picraft.world.World` to handle communication with the game server
@@ -106,8 +652,18 @@ class Connection(object):
 
     .. automethod:: send
 
+    .. automethod:: flush
+
     .. automethod:: transact
 
+    .. automethod:: transact_many
+
+    .. automethod:: transact_array
+
+    .. automethod:: transact_arrays
+
+    .. automethod:: transact_async
+
     .. automethod:: batch_start
 
     .. automethod:: batch_send
@@ -134,39 +690,214 @@ class Connection(object):
         The encoding that will be used for messages transmitted to, and
         received from the server. Defaults to ``'ascii'``.
 
+    .. attribute:: pipeline
+
+        If ``False`` (the default), each call to :meth:`transact` holds the
+        connection until its reply has been read, so concurrent threads
+        each pay a full round trip in turn. If ``True``, :meth:`transact`
+        releases the connection as soon as its request has been written;
+        other threads may then write their requests before the first reply
+        arrives and replies are handed back to their callers in the order
+        the requests were written.
+
+        .. warning::
+
+            Pipelining relies on the server answering every request that
+            expects a reply, and answering nothing else. A "Fail" produced by
+            a command sent with :meth:`send` while requests are outstanding
+            will be attributed to the oldest outstanding request. For this
+            reason pipelining is best combined with the default
+            :attr:`ignore_errors` setting.
+
+    .. attribute:: coalesce
+
+        If ``None`` (the default), every call to :meth:`send` outside a batch
+        is transmitted immediately, as a separate (small) network packet.
+        Otherwise, this is the maximum time in seconds that such commands may
+        be held back so they can be combined with subsequent ones into a
+        single transmission. Held commands are transmitted when this deadline
+        passes, when a request which expects a reply (like :meth:`transact`)
+        is made, when :meth:`flush` is called, or when the connection is
+        closed. A value of a few milliseconds (e.g. ``0.002``) gives most of
+        the benefit of :meth:`batch_start` without restructuring code.
+
+        Coalescing only applies while :attr:`ignore_errors` is ``True`` (when
+        it is ``False`` every command must wait for a possible response).
+
+    .. autoattribute:: reconnect
+
+    .. attribute:: metrics
+
+        If ``None`` (the default), no statistics are collected. Otherwise,
+        this is a :class:`ConnectionMetrics` instance in which the
+        connection's traffic is recorded. The same instance may be shared by
+        several connections to obtain aggregate statistics.
+
     .. autoattribute:: server_version
     """
 
+    # The maximum number of requests transact_many will write before reading
+    # some replies. If we never read, the server may block writing replies and
+    # stop reading our requests; with both sides blocked we'd deadlock
+    _window = 1024
+
+    # The maximum number of transmissions made without draining the socket
+    # when ignore_errors is set. Stray replies (e.g. "Fail") are normally
+    # drained just before the next request that expects a reply, but a long
+    # run of transmissions could otherwise fill the socket's receive buffer
+    _drain_interval = 1024
+
+    # The amount of coalesced data that causes an immediate transmission
+    _coalesce_limit = 65536
+
+    # The initial and maximum delays between attempts to reconnect
+    _reconnect_delay = 0.1
+    _reconnect_max_delay = 5.0
+
     def __init__(
             self, host, port, timeout=1.0, ignore_errors=True,
-            encoding='ascii'):
-        self._lock = threading.Lock()
+            encoding='ascii', pipeline=False, coalesce=None,
+            server_version=None, version_cache=None, metrics=None,
+            reconnect=None):
+        if (
+                server_version is not None and
+                server_version not in SERVER_VERSIONS):
+            raise ValueError('invalid server_version: %s' % server_version)
+        self.metrics = metrics
+        self._reconnect = reconnect
+        self._generation = 0
+        self._address = (host, port)
+        # Recovering from a lost connection happens in whichever thread
+        # notices the loss, which may already hold the writer's lock
+        if reconnect is None:
+            self._lock = threading.Lock()
+        else:
+            self._lock = threading.RLock()
+        self._rlock = threading.Lock()
         self._local = threading.local()
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        # This is effectively an interactive protocol, so disable Nagle's
-        # algorithm for better performance
-        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        self._socket.connect((host, port))
-        self._rfile = self._socket.makefile('rb', -1)
-        self._wfile = self._socket.makefile('wb', 0) # no buffering for writes
+        self._pending = deque()
+        self._rbuf = bytearray()
+        self._undrained = 0
+        self._wbuf = bytearray()
+        self._wdeadline = None
+        self._wcond = threading.Condition(self._lock)
+        self._flusher = None
+        self._socket = self._connect()
         self._directions = {} # temp space for calculated direction
         self.timeout = timeout
         self.encoding = encoding
-        # Determine what version of Minecraft we're talking to. Sadly, nobody
-        # seems to have thought about implementating an explicit means of
-        # doing this (a connection message, a getVersion() call, etc.) so
-        # we're relying on observed differences in implementation here...
-        self.ignore_errors = False
+        self.pipeline = pipeline
+        self.coalesce = coalesce
+        self.ignore_errors = ignore_errors
+        cache_key = '%s:%d' % (host, port)
+        if server_version is None and version_cache is not None:
+            server_version = _read_version_cache(version_cache, cache_key)
+        if server_version is None:
+            try:
+                server_version = self._probe()
+            except:
+                self.close()
+                raise
+            if version_cache is not None:
+                _write_version_cache(version_cache, cache_key, server_version)
+        self._server_version = server_version
+
+    def _connect(self):
+        """
+        Return a new socket connected to the server.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            test_result = self.transact('foo()')
-        except CommandError:
-            self._server_version = 'raspberry-juice'
-        except NoResponse:
-            self._server_version = 'minecraft-pi'
+            # This is effectively an interactive protocol, so disable Nagle's
+            # algorithm for better performance
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.connect(self._address)
+        except:
+            sock.close()
+            raise
+        return sock
+
+    def _probe(self):
+        """
+        Determine the version of the server with :data:`VERSION_PROBE`. Must
+        be called with :attr:`_lock` and :attr:`_rlock` held (or before the
+        connection is shared).
+        """
+        self._socket.sendall((VERSION_PROBE + '\n').encode(self.encoding))
+        result = self._readline(self.timeout)
+        if result is None:
+            raise NoResponse('no response to version probe')
+        if result == b'Fail':
+            # Consume the response to world.getPlayerIds()
+            if self._readline(self.timeout) is None:
+                raise NoResponse('no response to version probe')
+            return 'raspberry-juice'
         else:
-            raise CommandError('unexpected response to foo() test: %s' %
-                    test_result)
-        self.ignore_errors = ignore_errors
+            return 'minecraft-pi'
+
+    def _recover(self, generation):
+        """
+        Re-establish the connection after it was found to be lost during
+        *generation*, re-determine the server's version, and replay any
+        outstanding requests that are safe to repeat. Outstanding requests
+        that are not are failed with :exc:`~picraft.exc.ConnectionClosed`.
+        Must be called with :attr:`_lock` held.
+
+        If the connection has already been re-established (by another
+        thread), this does nothing. If it cannot be re-established within
+        :attr:`reconnect` seconds, all outstanding requests are failed and
+        :exc:`~picraft.exc.ConnectionClosed` is raised.
+        """
+        with self._rlock:
+            if generation != self._generation:
+                return
+            if not self._socket:
+                raise ConnectionClosed('connection closed')
+            logger.warning(
+                'connection to %s:%d lost; reconnecting', *self._address)
+            try:
+                self._socket.close()
+            except socket.error:
+                pass
+            del self._rbuf[:]
+            self._undrained = 0
+            self._generation += 1
+            deadline = monotonic() + self._reconnect
+            delay = self._reconnect_delay
+            while True:
+                try:
+                    self._socket = self._connect()
+                    self._server_version = self._probe()
+                except socket.error as e:
+                    if self._socket:
+                        self._socket.close()
+                    self._socket = None
+                    del self._rbuf[:]
+                    if monotonic() + delay > deadline:
+                        error = ConnectionClosed(
+                            'unable to reconnect to %s:%d: %s' % (
+                                self._address + (e,)))
+                        self._fail_pending(error)
+                        raise error
+                    sleep(delay)
+                    delay = min(delay * 2, self._reconnect_max_delay)
+                else:
+                    break
+            logger.warning(
+                'reconnected to %s:%d (%s)', self._address[0],
+                self._address[1], self._server_version)
+            replay = deque()
+            while self._pending:
+                reply = self._pending.popleft()
+                if reply._request is not None and _replayable(reply._request):
+                    replay.append(reply)
+                else:
+                    reply._set_error(ConnectionClosed(
+                        'connection lost before reply was received'))
+            if replay:
+                self._socket.sendall(b''.join(
+                    self._encode(reply._request) for reply in replay))
+                self._pending.extend(replay)
 
     def __repr__(self):
         host, port = self._socket.getpeername()
@@ -182,6 +913,43 @@ class Connection(object):
         """
         return self._server_version
 
+    @property
+    def reconnect(self):
+        """
+        If ``None`` (the default), the loss of the connection to the server is
+        permanent; the request that discovers it (and all subsequent
+        requests) raise :exc:`~picraft.exc.ConnectionClosed`. Otherwise, this
+        is the number of seconds for which attempts are made (with increasing
+        delays between them) to re-establish the connection, after which
+        :exc:`~picraft.exc.ConnectionClosed` is raised as usual.
+
+        When the connection is re-established, :attr:`server_version` is
+        determined afresh, and the transmission which discovered the loss
+        (e.g. a batch) is repeated. Queries which were awaiting a reply are
+        repeated too, so methods like :meth:`transact` (and hence
+        :meth:`~picraft.events.Events.poll` and
+        :meth:`~picraft.events.Events.main_loop`) carry on as though nothing
+        happened. Other requests awaiting a reply fail with
+        :exc:`~picraft.exc.ConnectionClosed`. This can only be specified
+        when the connection is constructed.
+
+        Enabling this costs an extra check of the socket before each
+        transmission, to discover whether the server has closed the
+        connection (e.g. because it was restarted) before anything is
+        transmitted into the void.
+
+        .. warning::
+
+            If the connection is lost without the server closing it (e.g. a
+            network failure), the loss is only discovered when reading a
+            reply or on a subsequent transmission; commands transmitted in
+            between (e.g. with :meth:`send`) are lost. Commands in a
+            repeated transmission may be executed twice; this is harmless
+            for commands like ``world.setBlock`` but may not be for others
+            like ``chat.post``.
+        """
+        return self._reconnect
+
     def close(self):
         """
         Closes the connection.
@@ -195,16 +963,28 @@ class Connection(object):
         except BatchNotStarted:
             pass
         with self._lock:
-            if self._rfile:
-                self._rfile.close()
-                self._rfile = None
-            if self._wfile:
-                self._wfile.close()
-                self._wfile = None
-            if self._socket:
-                self._socket.shutdown(socket.SHUT_RDWR)
-                self._socket.close()
-                self._socket = None
+            try:
+                self._flush()
+            except socket.error:
+                pass
+            with self._rlock:
+                self._fail_pending(ConnectionClosed('connection closed'))
+                del self._rbuf[:]
+                if self._socket:
+                    self._socket.shutdown(socket.SHUT_RDWR)
+                    self._socket.close()
+                    self._socket = None
+            # Wake the flusher (if any) so it notices we've closed
+            self._wcond.notify_all()
+
+    def _acquire(self):
+        """
+        Return a context manager which acquires :attr:`_lock`, timing the
+        wait if :attr:`metrics` is enabled.
+        """
+        if self.metrics is None:
+            return self._lock
+        return _TimedLock(self._lock, self.metrics)
 
     def _readable(self, timeout):
         """
@@ -212,30 +992,334 @@ class Connection(object):
         """
         return bool(select.select([self._socket], [], [], timeout)[0])
 
+    def _peer_closed(self):
+        """
+        Determines whether the server has closed (or reset) the connection,
+        without consuming anything from the socket.
+        """
+        try:
+            return self._readable(0) and not self._socket.recv(
+                1, socket.MSG_PEEK)
+        except socket.error:
+            return True
+
     def _drain(self):
         """
         Drain all data from the readable end of the socket. This is typically
         used to ensure that any "Fail" messages are removed prior to executing
         something for which we expect a result.
+
+        Nothing is drained while replies are outstanding, as anything waiting
+        to be read belongs to them. Likewise, nothing is drained while another
+        thread holds :attr:`_rlock` (which it only does while reading
+        replies) so that pipelined requests never wait for it.
         """
+        if self._pending or not self._rlock.acquire(False):
+            return
+        try:
+            if self._pending or not self._socket:
+                return
+            self._undrained = 0
+            del self._rbuf[:]
+            generation = self._generation
+            try:
+                while True:
+                    if not self._readable(0):
+                        return
+                    data = self._socket.recv(1500)
+                    if not data:
+                        break
+                    if self.metrics is not None:
+                        self.metrics._read(len(data))
+            except socket.error:
+                if self._reconnect is None:
+                    raise
+        finally:
+            self._rlock.release()
+        # The server has closed the connection; this is our chance to
+        # re-establish it before anything else is lost
+        if self._reconnect is not None:
+            self._recover(generation)
+
+    def _readline(self, timeout):
+        """
+        Return the next line (without its trailing newline) from the receive
+        buffer, reading from the socket as necessary. If no complete line
+        arrives within *timeout*, return ``None``. Must be called with
+        :attr:`_rlock` held.
+        """
+        start = 0
         while True:
-            if not self._readable(0):
-                break
-            self._socket.recv(1500)
+            i = self._rbuf.find(b'\n', start)
+            if i >= 0:
+                line = bytes(self._rbuf[:i])
+                del self._rbuf[:i + 1]
+                return line
+            # Don't re-scan what we've already searched when a long reply
+            # (e.g. world.getBlocks) arrives in many pieces
+            start = len(self._rbuf)
+            if not self._readable(timeout):
+                return None
+            data = self._socket.recv(65536)
+            if not data:
+                raise ConnectionClosed('connection closed by server')
+            if self.metrics is not None:
+                self.metrics._read(len(data))
+            self._rbuf.extend(data)
+
+    def _readarray(self, timeout):
+        """
+        Like :meth:`_readline`, but parses the line as comma-separated
+        integers into an ``array('H')`` as it arrives, so the entire line is
+        never held in memory. If the line is not numeric (e.g. "Fail") it is
+        returned as is. If no complete line arrives within *timeout*, return
+        ``None``. Must be called with :attr:`_rlock` held.
+        """
+        result = array(_UINT16)
+        start = 0
+        while True:
+            i = self._rbuf.find(b'\n', start)
+            if i >= 0:
+                line = bytes(self._rbuf[:i])
+                del self._rbuf[:i + 1]
+                if not result and line == b'Fail':
+                    return line
+                if line:
+                    result.extend(map(_parse_int, line.split(b',')))
+                return result
+            # Parse everything up to the last complete number we have
+            i = self._rbuf.rfind(b',')
+            if i >= 0:
+                result.extend(
+                    map(_parse_int, bytes(self._rbuf[:i]).split(b',')))
+                del self._rbuf[:i + 1]
+            start = len(self._rbuf)
+            if not self._readable(timeout):
+                if result:
+                    # We can't put back what we've already parsed, so the
+                    # reply stream is unusable
+                    raise NoResponse('incomplete response received')
+                return None
+            data = self._socket.recv(65536)
+            if not data:
+                raise ConnectionClosed('connection closed by server')
+            if self.metrics is not None:
+                self.metrics._read(len(data))
+            self._rbuf.extend(data)
+
+    def _fail_pending(self, error):
+        """
+        Mark all outstanding replies as failed with *error*. Must be called
+        with :attr:`_rlock` held.
+        """
+        while self._pending:
+            self._pending.popleft()._set_error(error)
+
+    def _read_reply(self):
+        """
+        Read the reply for the oldest outstanding request. Must be called with
+        :attr:`_rlock` held.
+        """
+        reply = self._pending[0]
+        try:
+            if not self._socket:
+                raise ConnectionClosed('connection closed')
+            if isinstance(reply, _ArrayReply):
+                line = self._readarray(self.timeout)
+            else:
+                line = self._readline(self.timeout)
+        except Exception as e:
+            if (self._reconnect is not None and self._socket and
+                    isinstance(e, socket.error)):
+                raise _Disconnected(self._generation)
+            # The reply stream is unusable; fail everything that's waiting
+            self._fail_pending(e)
+            return
+        self._pending.popleft()
+        if line is None:
+            if self.ignore_errors:
+                reply._set_result(None)
+            else:
+                reply._set_error(NoResponse('no response received'))
+            return
+        if isinstance(line, array):
+            logger.debug('<: %d integers', len(line))
+            reply._set_result(line)
+        else:
+            logger.debug('<: %r', line)
+            line = line.decode(self.encoding)
+            if line == 'Fail':
+                reply._set_error(CommandError('an error occurred'))
+            else:
+                reply._set_result(line)
+        if reply._sent is not None and self.metrics is not None:
+            self.metrics._reply(reply._command, monotonic() - reply._sent)
+
+    def _wait(self, reply):
+        """
+        Read replies (in order) until *reply* is complete. Any thread may read
+        replies on behalf of any other; the waiting thread simply checks
+        whether its own reply has arrived each time it acquires the reader.
+        """
+        while not reply._done:
+            try:
+                with self._rlock:
+                    if not reply._done:
+                        self._read_reply()
+            except _Disconnected as e:
+                with self._lock:
+                    self._recover(e.generation)
+
+    def _wait_all(self):
+        """
+        Read all outstanding replies.
+        """
+        try:
+            reply = self._pending[-1]
+        except IndexError:
+            pass
+        else:
+            self._wait(reply)
+
+    def _encode(self, buf):
+        """
+        Return *buf* encoded and terminated with a newline. If *buf* is
+        already a byte-string it is assumed to be encoded.
+        """
+        if not isinstance(buf, bytes):
+            buf = buf.encode(self.encoding)
+        if not buf.endswith(b'\n'):
+            buf += b'\n'
+        return buf
 
     def _send(self, buf):
         """
         Write *buf* (suitably encoded) to the socket.
         """
+        self._write(self._encode(buf))
+
+    def _write(self, buf):
+        """
+        Write the encoded bytes *buf* to the socket, preceded by any
+        coalesced data. Must be called with :attr:`_lock` held.
+        """
+        if not self._socket:
+            raise ConnectionClosed('connection closed')
+        if self._wbuf:
+            self._wbuf.extend(buf)
+            # Copy the coalesced data as the buffer is cleared once written
+            buf = bytes(self._wbuf)
+        try:
+            generation = self._generation
+            if self._reconnect is not None and self._peer_closed():
+                self._recover(generation)
+            try:
+                self._socket.sendall(buf)
+            except socket.error:
+                if self._reconnect is None:
+                    raise
+                self._recover(generation)
+                self._socket.sendall(buf)
+            if self.metrics is not None:
+                self.metrics._write(len(buf))
+        finally:
+            del self._wbuf[:]
+        logger.debug('>: %r', buf)
+        self._undrained += 1
+        if self.ignore_errors and self._undrained >= self._drain_interval:
+            self._drain()
+
+    def _flush(self):
+        """
+        Write any coalesced data to the socket. Must be called with
+        :attr:`_lock` held.
+        """
+        if self._wbuf:
+            self._write(b'')
+
+    def _coalesce(self, buf):
+        """
+        Append *buf* (suitably encoded) to the coalesced data, to be written
+        by the next call to :meth:`_write` or by the flusher thread. Must be
+        called with :attr:`_lock` held.
+        """
         if not self._socket:
             raise ConnectionClosed('connection closed')
-        if not buf.endswith('\n'):
-            buf += '\n'
-        buf = buf.encode(self.encoding)
+        start = not self._wbuf
+        self._wbuf.extend(self._encode(buf))
+        if len(self._wbuf) >= self._coalesce_limit:
+            self._flush()
+        elif start:
+            self._wdeadline = monotonic() + self.coalesce
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop)
+                self._flusher.daemon = True
+                self._flusher.start()
+            self._wcond.notify()
+
+    def _flush_loop(self):
+        """
+        Background thread which writes coalesced data once its deadline has
+        passed.
+        """
+        with self._wcond:
+            while self._socket:
+                if not self._wbuf:
+                    self._wcond.wait()
+                else:
+                    delay = self._wdeadline - monotonic()
+                    if delay > 0:
+                        self._wcond.wait(delay)
+                    else:
+                        try:
+                            self._flush()
+                        except Exception:
+                            # Leave the error to be discovered by the next
+                            # call that uses the connection
+                            logger.exception('failed to flush coalesced data')
+                            break
+
+    def _request(self, buf, reply_class=Reply):
+        """
+        Write *buf* to the socket and return a :class:`Reply` (or an instance
+        of *reply_class*) for its (mandatory) response. Must be called with
+        :attr:`_lock` held.
+        """
         if self.ignore_errors:
+            # Discard any stray replies to prior commands (see send)
             self._drain()
-        self._wfile.write(buf)
-        logger.debug('>: %r', buf)
+        self._send(buf)
+        reply = reply_class(self)
+        if self._reconnect is not None:
+            reply._request = buf
+        if self.metrics is not None:
+            reply._command = _command_name(buf)
+            reply._sent = monotonic()
+            self.metrics._transact(reply._command)
+        self._pending.append(reply)
+        return reply
+
+    def _request_many(self, bufs, reply_class=Reply):
+        """
+        Write all *bufs* in a single transmission and return a list of
+        *reply_class* instances for their responses. Must be called with
+        :attr:`_lock` held.
+        """
+        if self.ignore_errors:
+            self._drain()
+        self._write(b''.join(self._encode(buf) for buf in bufs))
+        replies = [reply_class(self) for buf in bufs]
+        if self._reconnect is not None:
+            for buf, reply in zip(bufs, replies):
+                reply._request = buf
+        if self.metrics is not None:
+            sent = monotonic()
+            for buf, reply in zip(bufs, replies):
+                reply._command = _command_name(buf)
+                reply._sent = sent
+                self.metrics._transact(reply._command)
+        self._pending.extend(replies)
+        return replies
 
     def _receive(self, required=False):
         """
@@ -250,13 +1334,15 @@ class Connection(object):
         exception is raised (this is case even if :attr:`ignore_errors` is
         ``True`` to maintain compatibility with the reference implementation).
         """
-        if not self._readable(self.timeout):
+        self._wait_all()
+        with self._rlock:
+            result = self._readline(self.timeout)
+        if result is None:
             if required and not self.ignore_errors:
                 raise NoResponse('no response received')
             return
-        result = self._rfile.readline()
         logger.debug('<: %r', result)
-        result = result.decode(self.encoding).rstrip('\n')
+        result = result.decode(self.encoding)
         if result == 'Fail':
             raise CommandError('an error occurred')
         return result
@@ -270,19 +1356,50 @@ class Connection(object):
         Minecraft server. If *buf* is a unicode string, the method attempts
         to encode the content in a byte-encoding prior to transmission (the
         encoding used is the :attr:`encoding` attribute of the class which
-        defaults to "ascii").
+        defaults to "ascii"). If *buf* is a byte-string it is assumed to be
+        encoded already (this is also true of the *buf* parameters of
+        :meth:`transact` and its variants).
 
         If a batch has been initiated, the contents of *buf* are appended to
         the batch (batches cannot be nested; see :meth:`batch_start` for more
-        information).
+        information). If this takes the batch past one of the thresholds given
+        to :meth:`batch_start`, the batch is transmitted immediately.
+
+        When :attr:`ignore_errors` is ``True``, this method makes a single
+        write to the socket. Any "Fail" responses the server produces are left
+        unread until the next request which expects a reply (such as
+        :meth:`transact`), which discards them before transmitting.
         """
+        if self.metrics is not None:
+            self.metrics._send(_command_name(buf))
         try:
-            self._local.batch.append(buf)
+            batch = self._local.batch
         except AttributeError:
-            with self._lock:
+            with self._acquire():
+                if self.ignore_errors and self.coalesce is not None:
+                    self._coalesce(buf)
+                    return
+                if not self.ignore_errors:
+                    # Any reply we read must belong to this command, not to
+                    # a request that is still outstanding
+                    self._wait_all()
                 self._send(buf)
                 if not self.ignore_errors:
                     self._receive()
+        else:
+            batch.data += self._encode(buf)
+            batch.count += 1
+            if batch.full():
+                self._batch_flush(batch)
+
+    def flush(self):
+        """
+        Transmits any commands held back by :attr:`coalesce`.
+
+        If :attr:`coalesce` is ``None`` this method does nothing.
+        """
+        with self._acquire():
+            self._flush()
 
     def transact(self, buf):
         """
@@ -290,6 +1407,8 @@ class Connection(object):
 
         This method immediately communicates the contents of *buf* to the
         connected server, then reads a line of data in reply and returns it.
+        If :attr:`pipeline` is ``True``, other threads may transmit their own
+        requests while this method waits for its reply.
 
         .. note::
 
@@ -298,11 +1417,127 @@ class Connection(object):
             is typically used to implement "getters", this is not usually an
             issue but it is worth bearing in mind.
         """
-        with self._lock:
-            self._send(buf)
-            return self._receive(required=True)
+        if self.pipeline:
+            with self._acquire():
+                reply = self._request(buf)
+            return reply.result()
+        else:
+            with self._acquire():
+                return self._request(buf).result()
+
+    def transact_many(self, bufs):
+        """
+        Transmits each string in *bufs*, and returns a list of the reply
+        strings.
+
+        This method is equivalent to calling :meth:`transact` for each item
+        of *bufs*, except that all requests are written in a single
+        transmission before any replies are read. Hence, querying many things
+        costs roughly one round trip to the server instead of one round trip
+        per query. For example::
+
+            >>> world.connection.transact_many([
+            ...     'world.getBlockWithData(0,0,0)',
+            ...     'world.getBlockWithData(0,1,0)',
+            ...     ])
+            ['2,0', '0,0']
+
+        *bufs* may be any iterable, including a generator; very large
+        iterables are transmitted in several pieces to avoid overwhelming the
+        server. If any reply is "Fail", a :exc:`~picraft.exc.CommandError` is
+        raised.
+
+        .. note::
+
+            Like :meth:`transact`, this method ignores the batch mechanism.
+        """
+        return self._transact_many(bufs, Reply)
+
+    def _transact_many(self, bufs, reply_class):
+        replies = []
+        bufs = iter(bufs)
+        while True:
+            chunk = list(islice(bufs, self._window))
+            if not chunk:
+                break
+            if len(replies) >= self._window:
+                self._wait(replies[-self._window])
+            with self._acquire():
+                replies.extend(self._request_many(chunk, reply_class))
+        return [reply.result() for reply in replies]
+
+    def transact_array(self, buf):
+        """
+        Transmits the contents of *buf*, and returns the reply (which must be
+        a comma-separated list of integers between 0 and 65535) as an
+        ``array('H')``.
+
+        This is intended for queries with very large replies, like
+        ``world.getBlocks``. The reply is parsed in pieces as it arrives
+        rather than being read as one enormous string and split, so the
+        only significant memory used is that of the result::
+
+            >>> world.connection.transact_array('world.getBlocks(0,0,0,1,0,1)')
+            array('H', [2, 2, 3, 2])
+
+        If the reply is "Fail", a :exc:`~picraft.exc.CommandError` is raised.
+        If no reply arrives the result depends on :attr:`ignore_errors` as
+        with :meth:`transact`.
+
+        .. note::
 
-    def batch_start(self):
+            Like :meth:`transact`, this method ignores the batch mechanism.
+        """
+        if self.pipeline:
+            with self._acquire():
+                reply = self._request(buf, _ArrayReply)
+            return reply.result()
+        else:
+            with self._acquire():
+                return self._request(buf, _ArrayReply).result()
+
+    def transact_arrays(self, bufs):
+        """
+        Transmits each string in *bufs*, and returns a list of the replies as
+        ``array('H')`` instances.
+
+        This combines :meth:`transact_many` and :meth:`transact_array`; all
+        requests are written before any replies are read, and each reply is
+        parsed in pieces as it arrives. This is useful for issuing several
+        ``world.getBlocks`` queries for the cost of a single round trip.
+
+        .. note::
+
+            Like :meth:`transact`, this method ignores the batch mechanism.
+        """
+        return self._transact_many(bufs, _ArrayReply)
+
+    def transact_async(self, buf):
+        """
+        Transmits the contents of *buf*, and returns a :class:`Reply` for the
+        response.
+
+        This method immediately communicates the contents of *buf* to the
+        connected server but does not wait for the response. Call
+        :meth:`Reply.result` on the returned object to obtain the reply
+        string. This permits many requests to be issued before waiting for any
+        of them::
+
+            >>> replies = [
+            ...     world.connection.transact_async(
+            ...         'world.getHeight(%d,0)' % x)
+            ...     for x in range(10)]
+            >>> [int(r.result()) for r in replies]
+            [0, 0, 0, 0, 1, 1, 2, 1, 0, 0]
+
+        .. note::
+
+            Like :meth:`transact`, this method ignores the batch mechanism.
+        """
+        with self._acquire():
+            return self._request(buf)
+
+    def batch_start(self, max_commands=None, max_bytes=None, max_delay=None):
         """
         Starts a new batch transmission.
 
@@ -310,6 +1545,23 @@ class Connection(object):
         subsequent calls to :meth:`send` will append data to the batch buffer
         instead of actually sending the data.
 
+        By default, nothing is transmitted until :meth:`batch_send` is called.
+        For very large batches this means holding every command in memory and
+        leaving the server idle until the end. The optional *max_commands*,
+        *max_bytes*, and *max_delay* thresholds cause the batch to be
+        transmitted (and the buffer re-used) whenever it holds that many
+        commands, that many encoded bytes, or whenever that many seconds have
+        passed since the last transmission (this is checked as commands are
+        added to the batch). For example::
+
+            >>> with world.connection.batch_start(max_bytes=65536):
+            ...     for v in vector_range(
+            ...             Vector(-100, 0, -100), Vector(100, 50, 100)):
+            ...         world.blocks[v] = Block('stone')
+
+        Note that :meth:`batch_forget` can only discard those commands that
+        have not yet been transmitted.
+
         To terminate the batch transmission, call :meth:`batch_send` or
         :meth:`batch_forget`. If a batch has already been started, a
         :exc:`~picraft.exc.BatchStarted` exception is raised.
@@ -324,11 +1576,33 @@ class Connection(object):
         try:
             self._local.batch
         except AttributeError:
-            self._local.batch = []
+            self._local.batch = _Batch(max_commands, max_bytes, max_delay)
             return self
         else:
             raise BatchStarted('batch already started')
 
+    def _batch_flush(self, batch):
+        """
+        Transmit the content of *batch* and empty it.
+        """
+        try:
+            if batch.data:
+                with self._acquire():
+                    if not self.ignore_errors:
+                        self._wait_all()
+                    self._write(batch.data)
+                    if self.metrics is not None:
+                        self.metrics._batch(batch.count)
+                    if not self.ignore_errors:
+                        try:
+                            self._receive()
+                        finally:
+                            self._drain()
+        finally:
+            del batch.data[:]
+            batch.count = 0
+            batch.started = monotonic()
+
     def batch_send(self):
         """
         Sends the batch transmission.
@@ -341,19 +1615,11 @@ class Connection(object):
         :exc:`~picraft.exc.BatchNotStarted` exception will be raised.
         """
         try:
-            self._local.batch
+            batch = self._local.batch
         except AttributeError:
             raise BatchNotStarted('no batch in progress')
         try:
-            if self._local.batch:
-                buf = '\n'.join(self._local.batch)
-                with self._lock:
-                    self._send(buf)
-                    try:
-                        if not self.ignore_errors:
-                            self._receive()
-                    finally:
-                        self._drain()
+            self._batch_flush(batch)
         finally:
             del self._local.batch
 
@@ -363,7 +1629,8 @@ class Connection(object):
 
         This method is called after :meth:`batch_start` and :meth:`send`
         have been used to build up a list of batch commands. All commands in
-        the batch will be cleared without sending anything to the server.
+        the batch which have not yet been transmitted will be cleared without
+        sending anything to the server.
 
         If no batch is currently in progress, a
         :exc:`~picraft.exc.BatchNotStarted` exception will be raised.
@@ -382,3 +1649,234 @@ class Connection(object):
         else:
             self.batch_forget()
 
+
+class ConnectionPool(object):
+    """
+    Represents a pool of connections to the same Minecraft server.
+
+    A single :class:`Connection` serializes every thread through one socket;
+    a thread waiting for a reply holds up every other thread wishing to
+    communicate. This class opens *size* connections (which defaults to 4) to
+    the server at *host* and *port* and assigns one to each thread (in
+    round-robin fashion) the first time that thread communicates. Threads
+    assigned different connections then have independent request and reply
+    streams. The remaining parameters are passed to each :class:`Connection`.
+
+    The class provides the same interface as :class:`Connection` so it can be
+    used anywhere a connection is expected. :class:`~picraft.world.World`
+    constructs one when its *pool_size* parameter is greater than 1::
+
+        >>> world = World(pool_size=4)
+        >>> world.connection
+        <ConnectionPool size=4, server_version="raspberry-juice">
+
+    .. note::
+
+        As the server may execute commands from different connections in any
+        order, commands from one thread are not guaranteed to be executed
+        before commands subsequently transmitted by another. Batches are
+        per-thread (as with :class:`Connection`) and hence are always
+        transmitted over a single connection.
+
+    .. automethod:: close
+
+    .. automethod:: send
+
+    .. automethod:: flush
+
+    .. automethod:: transact
+
+    .. automethod:: transact_many
+
+    .. automethod:: transact_array
+
+    .. automethod:: transact_arrays
+
+    .. automethod:: transact_async
+
+    .. automethod:: batch_start
+
+    .. automethod:: batch_send
+
+    .. automethod:: batch_forget
+
+    .. autoattribute:: connections
+
+    .. autoattribute:: metrics
+
+    .. autoattribute:: server_version
+    """
+
+    def __init__(
+            self, host, port, size=4, timeout=1.0, ignore_errors=True,
+            encoding='ascii', pipeline=False, coalesce=None,
+            server_version=None, version_cache=None, metrics=None,
+            reconnect=None):
+        if size < 1:
+            raise ValueError('size must be 1 or more')
+        self._local = threading.local()
+        self._counter = count()
+        self._directions = {} # temp space for calculated direction
+        self._connections = []
+        try:
+            for i in range(size):
+                self._connections.append(Connection(
+                    host, port, timeout, ignore_errors, encoding, pipeline,
+                    coalesce, server_version, version_cache, metrics,
+                    reconnect))
+                # Only the first connection needs to determine the version
+                server_version = self._connections[0].server_version
+        except:
+            self.close()
+            raise
+
+    def __repr__(self):
+        return '<ConnectionPool size=%d, server_version="%s">' % (
+                len(self._connections), self.server_version)
+
+    @property
+    def connections(self):
+        """
+        The sequence of :class:`Connection` instances in the pool.
+        """
+        return tuple(self._connections)
+
+    @property
+    def server_version(self):
+        """
+        Returns an object representing the version of the Minecraft server;
+        see :attr:`Connection.server_version`.
+        """
+        return self._connections[0].server_version
+
+    def _get_connection(self):
+        """
+        Returns the connection assigned to the calling thread.
+        """
+        try:
+            return self._local.connection
+        except AttributeError:
+            self._local.connection = self._connections[
+                next(self._counter) % len(self._connections)]
+            return self._local.connection
+
+    def close(self):
+        """
+        Closes all connections in the pool.
+        """
+        for conn in self._connections:
+            conn.close()
+
+    def send(self, buf):
+        """
+        Transmits the contents of *buf* over the calling thread's connection;
+        see :meth:`Connection.send`.
+        """
+        self._get_connection().send(buf)
+
+    def flush(self):
+        """
+        Transmits any commands held back by :attr:`Connection.coalesce` on
+        all connections in the pool.
+        """
+        for conn in self._connections:
+            conn.flush()
+
+    def transact(self, buf):
+        """
+        Transmits the contents of *buf* over the calling thread's connection
+        and returns the reply string; see :meth:`Connection.transact`.
+        """
+        return self._get_connection().transact(buf)
+
+    def transact_many(self, bufs):
+        """
+        Transmits each string in *bufs* over the calling thread's connection
+        and returns a list of the reply strings; see
+        :meth:`Connection.transact_many`.
+        """
+        return self._get_connection().transact_many(bufs)
+
+    def transact_array(self, buf):
+        """
+        Transmits the contents of *buf* over the calling thread's connection
+        and returns the reply as an ``array('H')``; see
+        :meth:`Connection.transact_array`.
+        """
+        return self._get_connection().transact_array(buf)
+
+    def transact_arrays(self, bufs):
+        """
+        Transmits each string in *bufs* over the calling thread's connection
+        and returns a list of the replies as ``array('H')`` instances; see
+        :meth:`Connection.transact_arrays`.
+        """
+        return self._get_connection().transact_arrays(bufs)
+
+    def transact_async(self, buf):
+        """
+        Transmits the contents of *buf* over the calling thread's connection
+        and returns a :class:`Reply`; see :meth:`Connection.transact_async`.
+        """
+        return self._get_connection().transact_async(buf)
+
+    def batch_start(self, max_commands=None, max_bytes=None, max_delay=None):
+        """
+        Starts a new batch transmission on the calling thread's connection;
+        see :meth:`Connection.batch_start`.
+        """
+        self._get_connection().batch_start(max_commands, max_bytes, max_delay)
+        return self
+
+    def batch_send(self):
+        """
+        Sends the calling thread's batch; see :meth:`Connection.batch_send`.
+        """
+        self._get_connection().batch_send()
+
+    def batch_forget(self):
+        """
+        Terminates the calling thread's batch without sending anything; see
+        :meth:`Connection.batch_forget`.
+        """
+        self._get_connection().batch_forget()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is None:
+            self.batch_send()
+        else:
+            self.batch_forget()
+
+    def _get_timeout(self):
+        return self._connections[0].timeout
+    def _set_timeout(self, value):
+        for conn in self._connections:
+            conn.timeout = value
+    timeout = property(_get_timeout, _set_timeout, doc="""\
+        The timeout of all connections in the pool; see
+        :attr:`Connection.timeout`.
+        """)
+
+    def _get_ignore_errors(self):
+        return self._connections[0].ignore_errors
+    def _set_ignore_errors(self, value):
+        for conn in self._connections:
+            conn.ignore_errors = value
+    ignore_errors = property(_get_ignore_errors, _set_ignore_errors, doc="""\
+        The error handling of all connections in the pool; see
+        :attr:`Connection.ignore_errors`.
+        """)
+
+    def _get_metrics(self):
+        return self._connections[0].metrics
+    def _set_metrics(self, value):
+        for conn in self._connections:
+            conn.metrics = value
+    metrics = property(_get_metrics, _set_metrics, doc="""\
+        The :class:`ConnectionMetrics` shared by all connections in the pool
+        (or ``None`` if statistics are not being collected); see
+        :attr:`Connection.metrics`.
+        """)
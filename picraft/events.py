@@ -95,6 +95,7 @@ from functools import update_wrapper
 from types import FunctionType
 
 from .exc import ConnectionClosed, NoHandlersWarning
+from .connection import _encode_get_pos
 from .vector import Vector
 from .player import Player
 
@@ -322,18 +323,18 @@ class Events(object):
         return self._track_players.keys()
     def _set_track_players(self, value):
         try:
-            self._track_players = {
-                pid: Player(self._connection, pid).pos.round(1)
-                for pid in value
-                }
+            players = [Player(self._connection, pid) for pid in value]
         except TypeError:
             if not isinstance(value, int):
                 raise ValueError(
                         'track_players value must be a player id '
                         'or a sequence of player ids')
-            self._track_players = {
-                value: Player(self._connection, value).pos.round(1)
-                }
+            players = [Player(self._connection, value)]
+        self._track_players = {
+            player.player_id: Vector.from_string(s, type=float).round(1)
+            for player, s in zip(players, self._connection.transact_many(
+                _encode_get_pos(player.player_id) for player in players))
+            }
         if self._connection.server_version != 'raspberry-juice':
             # Filter out calculated directions for untracked players
             self._connection._directions = {
@@ -346,8 +347,9 @@ class Events(object):
 
         By default the :meth:`poll` method will not produce player position
         events (:class:`PlayerPosEvent`). Producing these events requires extra
-        interactions with the Minecraft server (one for each player tracked)
-        which slow down response to block hit events.
+        queries of the Minecraft server (one for each player tracked, though
+        all are sent together with the event queries) which slow down response
+        to block hit events.
 
         If you wish to track player positions, set this attribute to the set of
         player ids you wish to track and their positions will be stored.  The
@@ -400,10 +402,21 @@ class Events(object):
             >>> w.events.poll()
             [<IdleEvent>]
         """
+        # Query the positions of all tracked players and the event queues in
+        # a single round trip
+        players = [
+            Player(self._connection, pid) for pid in self._track_players]
+        requests = [_encode_get_pos(pid) for pid in self._track_players]
+        requests.append(b'events.block.hits()\n')
+        if self._connection.server_version == 'raspberry-juice':
+            requests.append(b'events.chat.posts()\n')
+        replies = self._connection.transact_many(requests)
+
         def player_pos_events(positions):
-            for pid, old_pos in positions.items():
-                player = Player(self._connection, pid)
-                new_pos = player.pos.round(1)
+            for player, s in zip(players, replies):
+                pid = player.player_id
+                old_pos = positions[pid]
+                new_pos = Vector.from_string(s, type=float).round(1)
                 if old_pos != new_pos:
                     if self._connection.server_version != 'raspberry-juice':
                         # Calculate directions for tracked players on platforms
@@ -413,14 +426,14 @@ class Events(object):
                 positions[pid] = new_pos
 
         def block_hit_events():
-            s = self._connection.transact('events.block.hits()')
+            s = replies[len(players)]
             if s:
                 for e in s.split('|'):
                     yield BlockHitEvent.from_string(self._connection, e)
 
         def chat_post_events():
             if self._connection.server_version == 'raspberry-juice':
-                s = self._connection.transact('events.chat.posts()')
+                s = replies[len(players) + 1]
                 if s:
                     for e in s.split('|'):
                         yield ChatPostEvent.from_string(self._connection, e)
@@ -554,7 +567,7 @@ class Events(object):
         def handler(event):
             if not f._picraft_classes:
                 # The handler is a straight-forward function; just call it
-                f(event)
+                self._call_handler(f, event)
             else:
                 # The handler is an unbound method (yes, I know these don't
                 # really exist in Python 3; it's a function which is expecting
@@ -569,10 +582,13 @@ class Events(object):
                         if inst.__class__ == cls:
                             # Bind the function to the instance via its
                             # descriptor
-                            f.__get__(inst, cls)(event)
+                            self._call_handler(f.__get__(inst, cls), event)
         update_wrapper(handler, f)
         return handler
 
+    def _call_handler(self, f, event):
+        f(event)
+
     def on_idle(self, thread=False, multi=True):
         """
         Decorator for registering a function/method as an idle handler.
@@ -0,0 +1,289 @@
+# vim: set et sw=4 sts=4 fileencoding=utf-8:
+#
+# An alternate Python Minecraft library for the Rasperry-Pi
+# Copyright (c) 2013-2016 Dave Jones <dave@waveform.org.uk>
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the copyright holder nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+The image module defines the :func:`image_to_blocks` function, which converts
+images into regions of blocks which can be written to the Minecraft world.
+
+.. note::
+
+    All items in this module are available from the :mod:`picraft` namespace
+    without having to import :mod:`picraft.image` directly.
+
+The following items are defined in the module:
+
+
+image_to_blocks
+===============
+
+.. autofunction:: image_to_blocks
+"""
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+str = type('')
+
+
+from array import array
+
+from .block import Block, BlockArray
+from .connection import _UINT16, _UINT8
+from .vector import Vector, vector_range
+
+
+def _region(origin, plane, width, height):
+    # Return a vector_range covering the image, ordered such that it matches
+    # the row-major order of the image's pixels with the first row at the top
+    # (or the far edge for a horizontal image)
+    x, y, z = origin
+    if plane == 'xy':
+        return vector_range(
+            Vector(x, y + height - 1, z), Vector(x + width, y - 1, z + 1),
+            Vector(1, -1, 1), order='xyz')
+    elif plane == 'zy':
+        return vector_range(
+            Vector(x, y + height - 1, z), Vector(x + 1, y - 1, z + width),
+            Vector(1, -1, 1), order='zyx')
+    elif plane == 'xz':
+        return vector_range(
+            Vector(x, y, z), Vector(x + width, y + 1, z + height),
+            order='xzy')
+    else:
+        raise ValueError('invalid plane: %s' % plane)
+
+
+def _image_pixels(image, size):
+    # Return the width and height of *image*, along with its pixels as a
+    # bytes-like object of packed RGB values, or an ndarray
+    if hasattr(image, 'convert') and hasattr(image, 'tobytes'):
+        # A PIL image
+        width, height = image.size
+        return width, height, image.convert('RGB').tobytes()
+    elif hasattr(image, '__array_interface__'):
+        # A NumPy array
+        if len(image.shape) != 3 or image.shape[2] not in (3, 4):
+            raise ValueError(
+                'expected an array of shape (height, width, 3), not %r' % (
+                    image.shape,))
+        height, width = image.shape[:2]
+        return width, height, image[..., :3]
+    else:
+        if size is None:
+            raise ValueError('size must be specified for a raw RGB buffer')
+        width, height = size
+        pixels = bytearray(image)
+        if len(pixels) != width * height * 3:
+            raise ValueError(
+                'expected %d bytes of RGB data for a %dx%d image, not %d' % (
+                    width * height * 3, width, height, len(pixels)))
+        return width, height, pixels
+
+
+def _map_numpy(pixels, palette, metric):
+    # Map every pixel to the index of its nearest palette color. Distances are
+    # only calculated for the unique colors of the image; for the RGB metric
+    # argmin picks the first of any equally near colors, matching _ColorIndex
+    import numpy as np
+    if hasattr(pixels, '__array_interface__'):
+        pixels = np.asarray(pixels, dtype=np.uint8).reshape(-1, 3)
+    else:
+        pixels = np.frombuffer(bytes(pixels), dtype=np.uint8).reshape(-1, 3)
+    packed = (
+        (pixels[:, 0].astype(np.uint32) << 16) |
+        (pixels[:, 1].astype(np.uint32) << 8) |
+        pixels[:, 2].astype(np.uint32))
+    colors, inverse = np.unique(packed, return_inverse=True)
+    colors = np.stack(
+        [(colors >> 16) & 0xff, (colors >> 8) & 0xff, colors & 0xff],
+        axis=1).astype(np.int32)
+    if metric == 'rgb':
+        nearest = np.empty(len(colors), dtype=np.intp)
+        palette = np.array(palette, dtype=np.int32)
+        # Work in chunks to bound the size of the distance matrix
+        for start in range(0, len(colors), 65536):
+            chunk = colors[start:start + 65536]
+            nearest[start:start + 65536] = np.argmin(
+                ((chunk[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2),
+                axis=1)
+    else:
+        index = Block._color_index(metric)
+        positions = {color: i for i, color in enumerate(palette)}
+        nearest = np.array([
+            positions[index.nearest(color)]
+            for color in map(tuple, colors.tolist())
+            ], dtype=np.intp)
+    return nearest[inverse.ravel()]
+
+
+def _to_bytes(pixels):
+    # Convert the pixels of an ndarray to packed RGB bytes
+    if hasattr(pixels, '__array_interface__'):
+        import numpy as np
+        return np.ascontiguousarray(pixels, dtype=np.uint8).tobytes()
+    return pixels
+
+
+def _blocks(choices, blocks):
+    # Convert the palette indexes in *choices* to arrays of block ids and
+    # data values
+    if hasattr(choices, '__array_interface__'):
+        import numpy as np
+        return (
+            array(_UINT16, np.array(
+                [b[0] for b in blocks], dtype=np.uint16)[choices].tobytes()),
+            array(_UINT8, np.array(
+                [b[1] for b in blocks], dtype=np.uint8)[choices].tobytes()),
+            )
+    return (
+        array(_UINT16, [blocks[i][0] for i in choices]),
+        array(_UINT8, [blocks[i][1] for i in choices]),
+        )
+
+
+def _map_python(pixels, palette, metric):
+    # Map every pixel to the index of its nearest palette color, memoising
+    # the result for each distinct color
+    index = Block._color_index(metric)
+    positions = {color: i for i, color in enumerate(palette)}
+    cache = {}
+    result = array(_UINT8)
+    for color in zip(*[iter(pixels)] * 3):
+        try:
+            result.append(cache[color])
+        except KeyError:
+            i = cache[color] = positions[index.nearest(color)]
+            result.append(i)
+    return result
+
+
+def _map_dither(pixels, width, height, palette, metric):
+    # Map every pixel to the index of its nearest palette color using
+    # Floyd-Steinberg dithering to diffuse the error of each choice into the
+    # neighbouring pixels to the right and below
+    index = Block._color_index(metric)
+    positions = {color: i for i, color in enumerate(palette)}
+    cache = {}
+    result = array(_UINT8)
+    # Each row of errors is padded by a pixel on either side to avoid bounds
+    # checks when diffusing the error of the first and last pixels
+    errors = [[0.0] * (width + 2) for channel in range(3)]
+    for y in range(height):
+        below = [[0.0] * (width + 2) for channel in range(3)]
+        offset = y * width * 3
+        for x in range(width):
+            color = tuple(
+                min(255, max(0, int(round(
+                    pixels[offset + x * 3 + channel] +
+                    errors[channel][x + 1]))))
+                for channel in range(3))
+            try:
+                nearest = cache[color]
+            except KeyError:
+                nearest = cache[color] = index.nearest(color)
+            result.append(positions[nearest])
+            for channel in range(3):
+                error = color[channel] - nearest[channel]
+                if error:
+                    errors[channel][x + 2] += error * 7 / 16
+                    below[channel][x] += error * 3 / 16
+                    below[channel][x + 1] += error * 5 / 16
+                    below[channel][x + 2] += error / 16
+        errors = below
+    return result
+
+
+def image_to_blocks(
+        image, size=None, origin=None, plane='xy', dither=False,
+        metric='rgb'):
+    """
+    Convert *image* into a :class:`~picraft.block.BlockArray` by mapping each
+    pixel to the block with the nearest color (as in
+    :meth:`~picraft.block.Block.from_color`).
+
+    The *image* may be a `PIL`_ image, a NumPy array of integer RGB values
+    with the shape ``(height, width, 3)``, or any bytes-like object (such as
+    :class:`bytes`, :class:`bytearray`, or an :class:`~array.array`) of packed
+    RGB bytes in row-major order. In the latter case *size* must be given as a
+    ``(width, height)`` tuple.
+
+    The resulting array covers a region with its lower (or nearest) left
+    corner at *origin* (which defaults to ``Vector(0, 0, 0)``). The *plane*
+    determines the orientation of the region: ``'xy'`` (the default) and
+    ``'zy'`` produce a vertical banner extending along the X or Z axis
+    respectively, while ``'xz'`` produces a horizontal map with the top of the
+    image at *origin* extending along the Z axis. The array can be written to
+    the world by assigning it to its :attr:`~picraft.block.BlockArray.vrange`,
+    which merges areas of identical blocks into as few commands as possible::
+
+        >>> from picraft import *
+        >>> from PIL import Image
+        >>> world = World()
+        >>> banner = image_to_blocks(
+        ...     Image.open('logo.png'), origin=Vector(0, 0, 10))
+        >>> world.blocks[banner.vrange] = banner
+
+    If *dither* is ``True``, `Floyd-Steinberg dithering`_ is applied which
+    diffuses the difference between each pixel's color and its block's color
+    to neighbouring pixels. This produces a much better approximation of
+    images with gradients at the cost of slower conversion and (usually) many
+    more commands to write the result.
+
+    The *metric* used to determine the nearest color may be any of the values
+    accepted by :meth:`~picraft.block.Block.from_color`; the perceptual
+    metrics (``'cie76'`` and ``'cie2000'``) generally produce more faithful
+    results at little extra cost. If NumPy is installed, undithered
+    conversion of the image is vectorised.
+
+    .. _PIL: https://pillow.readthedocs.io/
+    .. _Floyd-Steinberg dithering: https://en.wikipedia.org/wiki/Floyd%E2%80%93Steinberg_dithering
+    """
+    if origin is None:
+        origin = Vector()
+    width, height, pixels = _image_pixels(image, size)
+    vrange = _region(origin, plane, width, height)
+    palette = list(Block._color_index(metric).palette)
+    if dither:
+        choices = _map_dither(
+            bytearray(_to_bytes(pixels)), width, height, palette, metric)
+    else:
+        try:
+            choices = _map_numpy(pixels, palette, metric)
+        except ImportError:
+            choices = _map_python(bytearray(pixels), palette, metric)
+    ids, data = _blocks(
+        choices, [Block._BLOCKS_BY_COLOR[color] for color in palette])
+    return BlockArray(vrange, ids, data)
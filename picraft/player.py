@@ -68,6 +68,7 @@ str = type('')
 
 
 from .exc import ConnectionError, NotSupported
+from .connection import _encode_get_pos
 from .vector import Vector, X, Y, Z
 
 
@@ -151,7 +152,8 @@ class BasePlayer(object):
 
     def _get_pos(self):
         return Vector.from_string(
-            self._connection.transact(self._cmd('getPos')), type=float)
+            self._connection.transact(_encode_get_pos(self._player_id)),
+            type=float)
     def _set_pos(self, value):
         self._connection.send(
             self._cmd('setPos', value.x, value.y, value.z))
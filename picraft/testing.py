@@ -0,0 +1,758 @@
+# vim: set et sw=4 sts=4 fileencoding=utf-8:
+#
+# An alternate Python Minecraft library for the Rasperry-Pi
+# Copyright (c) 2013-2016 Dave Jones <dave@waveform.org.uk>
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the copyright holder nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+The testing module defines the :class:`MockServer` class, an in-process TCP
+server that speaks the same text protocol as Minecraft Pi and Raspberry Juice.
+It is backed by an in-memory :class:`MockWorld` and is intended for use in
+tests and benchmarks where a real game is unavailable::
+
+    >>> from picraft import World, Vector, Block
+    >>> from picraft.testing import MockServer
+    >>> with MockServer() as server:
+    ...     world = World(*server.address)
+    ...     world.blocks[Vector(0, 0, 0)] = Block('stone')
+    ...     world.blocks[Vector(0, 0, 0)]
+    ...
+    <Block "stone" id=1 data=0>
+
+.. note::
+
+    Unlike the rest of the library, items in this module are *not* available
+    from the :mod:`picraft` namespace; import :mod:`picraft.testing`
+    explicitly.
+
+The following items are defined in the module:
+
+
+MockServer
+==========
+
+.. autoclass:: MockServer
+    :members:
+
+
+MockWorld
+=========
+
+.. autoclass:: MockWorld
+    :members:
+"""
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+str = type('')
+
+
+import math
+import socket
+import logging
+import threading
+from collections import deque, Counter
+try:
+    from time import monotonic
+except ImportError:
+    # Py2 compat
+    from time import time as monotonic
+from time import sleep
+try:
+    import socketserver
+except ImportError:
+    # Py2 compat
+    import SocketServer as socketserver
+
+from .connection import SERVER_VERSIONS
+from .vector import Vector
+
+logger = logging.getLogger('picraft')
+
+
+# The commands each server implements; anything else is treated as an unknown
+# command which Minecraft Pi silently ignores and Raspberry Juice answers with
+# "Fail"
+_COMMON_COMMANDS = {
+    'world.getBlock',
+    'world.getBlockWithData',
+    'world.setBlock',
+    'world.setBlocks',
+    'world.getHeight',
+    'world.getPlayerIds',
+    'world.setting',
+    'chat.post',
+    'player.getPos',
+    'player.setPos',
+    'player.getTile',
+    'player.setTile',
+    'entity.getPos',
+    'entity.setPos',
+    'entity.getTile',
+    'entity.setTile',
+    'events.clear',
+    'events.block.hits',
+    }
+
+_COMMANDS = {
+    'minecraft-pi': _COMMON_COMMANDS | {
+        'world.checkpoint.save',
+        'world.checkpoint.restore',
+        'player.setting',
+        'camera.mode.setNormal',
+        'camera.mode.setFixed',
+        'camera.mode.setFollow',
+        'camera.setPos',
+        },
+    'raspberry-juice': _COMMON_COMMANDS | {
+        'world.getBlocks',
+        'world.getPlayerId',
+        'player.getRotation',
+        'player.getPitch',
+        'player.getDirection',
+        'entity.getRotation',
+        'entity.getPitch',
+        'entity.getDirection',
+        'events.chat.posts',
+        },
+    }
+
+_FACES = {
+    'y-': 0,
+    'y+': 1,
+    'z-': 2,
+    'z+': 3,
+    'x-': 4,
+    'x+': 5,
+    }
+
+
+class _MockPlayer(object):
+    __slots__ = ('name', 'pos', 'rotation', 'pitch')
+
+    def __init__(self, name, pos):
+        self.name = name
+        self.pos = pos
+        self.rotation = 0.0
+        self.pitch = 0.0
+
+
+class MockWorld(object):
+    """
+    The in-memory state behind a :class:`MockServer`.
+
+    Blocks are stored sparsely as a dictionary mapping ``(x, y, z)`` tuples to
+    ``(id, data)`` tuples. Every position below *ground* which hasn't been
+    explicitly set reads as stone, and every other position as air. The world
+    starts with a single player (the host player) whose id is *host_id*,
+    standing on the ground at the origin.
+
+    All methods are thread-safe; a single world may be shared by several
+    connections (or several servers).
+
+    .. attribute:: blocks
+
+        The dictionary of explicitly set blocks. This should be treated as
+        read-only; use :meth:`set_block` and :meth:`set_blocks` to modify it.
+
+    .. attribute:: chat
+
+        A list of all messages posted with ``chat.post``.
+
+    .. attribute:: settings
+
+        A dictionary of the values passed to ``world.setting`` and
+        ``player.setting``, keyed by setting name.
+    """
+
+    def __init__(self, ground=0, host_id=1):
+        self.ground = ground
+        self.host_id = host_id
+        self.blocks = {}
+        self.chat = []
+        self._columns = {}
+        self.settings = {}
+        self._lock = threading.RLock()
+        self._players = {}
+        self._hits = deque()
+        self._posts = deque()
+        self._checkpoint = None
+        self.add_player('host', Vector(0.5, ground, 0.5), player_id=host_id)
+
+    def _default(self, y):
+        return (1, 0) if y < self.ground else (0, 0)
+
+    def get_block(self, x, y, z):
+        """
+        Return the ``(id, data)`` tuple for the block at (*x*, *y*, *z*).
+        """
+        try:
+            return self.blocks[(x, y, z)]
+        except KeyError:
+            return self._default(y)
+
+    def set_block(self, x, y, z, id, data=0):
+        """
+        Set the block at (*x*, *y*, *z*) to *id* and *data*.
+        """
+        with self._lock:
+            if (id, data) == self._default(y):
+                self.blocks.pop((x, y, z), None)
+            else:
+                self.blocks[(x, y, z)] = (id, data)
+            column = self._columns.setdefault((x, z), set())
+            if id == 0:
+                column.discard(y)
+            else:
+                column.add(y)
+
+    def set_blocks(self, x1, y1, z1, x2, y2, z2, id, data=0):
+        """
+        Set every block in the cuboid between (*x1*, *y1*, *z1*) and (*x2*,
+        *y2*, *z2*) inclusive to *id* and *data*.
+        """
+        with self._lock:
+            for y in range(min(y1, y2), max(y1, y2) + 1):
+                for x in range(min(x1, x2), max(x1, x2) + 1):
+                    for z in range(min(z1, z2), max(z1, z2) + 1):
+                        self.set_block(x, y, z, id, data)
+
+    def get_height(self, x, z):
+        """
+        Return the y-coordinate of the highest non-air block at (*x*, *z*).
+        """
+        with self._lock:
+            y = self.ground - 1
+            while self.blocks.get((x, y, z), (1, 0))[0] == 0:
+                y -= 1
+            return max(self._columns.get((x, z), set()) | {y})
+
+    def add_player(self, name, pos, player_id=None):
+        """
+        Add a player called *name* at *pos* (a :class:`~picraft.vector.Vector`)
+        and return its id. If *player_id* is ``None`` the next unused id is
+        allocated.
+        """
+        with self._lock:
+            if player_id is None:
+                player_id = max(self._players) + 1 if self._players else 1
+            self._players[player_id] = _MockPlayer(name, pos)
+            return player_id
+
+    def remove_player(self, player_id):
+        """
+        Remove the player with id *player_id* from the world.
+        """
+        with self._lock:
+            del self._players[player_id]
+
+    def move_player(self, player_id, pos, rotation=None, pitch=None):
+        """
+        Move the player with id *player_id* to *pos*, and optionally set its
+        *rotation* and *pitch* (in degrees).
+        """
+        with self._lock:
+            player = self._players[player_id]
+            player.pos = pos
+            if rotation is not None:
+                player.rotation = rotation
+            if pitch is not None:
+                player.pitch = pitch
+
+    def player_pos(self, player_id):
+        """
+        Return the position of the player with id *player_id*.
+        """
+        return self._players[player_id].pos
+
+    def hit_block(self, pos, face='y+', player_id=None):
+        """
+        Queue an event for the player with id *player_id* (defaulting to the
+        host player) hitting the block at *pos* on *face* (one of ``'x-'``,
+        ``'x+'``, ``'y-'``, ``'y+'``, ``'z-'``, or ``'z+'``).
+        """
+        if player_id is None:
+            player_id = self.host_id
+        with self._lock:
+            self._hits.append((pos, _FACES[face], player_id))
+
+    def post_chat(self, message, player_id=None):
+        """
+        Queue an event for the player with id *player_id* (defaulting to the
+        host player) posting *message* to the chat console.
+        """
+        if player_id is None:
+            player_id = self.host_id
+        with self._lock:
+            self._posts.append((message, player_id))
+
+    def save_checkpoint(self):
+        """
+        Save the current state of the blocks.
+        """
+        with self._lock:
+            self._checkpoint = dict(self.blocks)
+
+    def restore_checkpoint(self):
+        """
+        Restore the blocks to the state they had at the last checkpoint.
+        """
+        with self._lock:
+            if self._checkpoint is not None:
+                self.blocks = dict(self._checkpoint)
+                self._columns = {}
+                for (x, y, z), (id, data) in self.blocks.items():
+                    if id != 0:
+                        self._columns.setdefault((x, z), set()).add(y)
+
+    def clear_events(self):
+        """
+        Discard all queued events.
+        """
+        with self._lock:
+            self._hits.clear()
+            self._posts.clear()
+
+    def pop_hits(self):
+        """
+        Remove and return all queued block hit events as a list of ``(pos,
+        face, player_id)`` tuples.
+        """
+        with self._lock:
+            result = list(self._hits)
+            self._hits.clear()
+            return result
+
+    def pop_posts(self):
+        """
+        Remove and return all queued chat post events as a list of
+        ``(message, player_id)`` tuples.
+        """
+        with self._lock:
+            result = list(self._posts)
+            self._posts.clear()
+            return result
+
+
+def _format_float(f):
+    return '%r' % float(f)
+
+
+def _format_vector(v, fmt=str):
+    return ','.join(fmt(i) for i in v)
+
+
+class _MockHandler(socketserver.BaseRequestHandler):
+    # One instance of this class is constructed for each client connection.
+    # Commands are processed strictly in order; when latency is configured
+    # replies are handed to a separate writer thread which releases each one
+    # when its deadline passes, so pipelined commands overlap their latency as
+    # they would with a real server
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.mock = self.server.mock
+        with self.mock._lock:
+            self.mock._clients.add(self.request)
+        self.commands = _COMMANDS[self.mock.server_version]
+        self.replies = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.writer = None
+        if self.mock.latency:
+            self.writer = threading.Thread(target=self.write_loop)
+            self.writer.daemon = True
+            self.writer.start()
+
+    def finish(self):
+        with self.mock._lock:
+            self.mock._clients.discard(self.request)
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        if self.writer is not None:
+            self.writer.join()
+
+    def handle(self):
+        buf = bytearray()
+        while True:
+            try:
+                data = self.request.recv(65536)
+            except socket.error:
+                break
+            if not data:
+                break
+            buf.extend(data)
+            lines = buf.split(b'\n')
+            buf = lines.pop()
+            for line in lines:
+                received = monotonic()
+                reply = self.process(line.rstrip(b'\r').decode('utf-8'))
+                if reply is not None:
+                    try:
+                        self.reply(received, reply.encode('utf-8') + b'\n')
+                    except socket.error:
+                        # The client has gone away
+                        return
+
+    def reply(self, received, data):
+        if self.writer is None:
+            self.request.sendall(data)
+        else:
+            with self.cond:
+                self.replies.append((received + self.mock.latency, data))
+                self.cond.notify()
+
+    def write_loop(self):
+        while True:
+            with self.cond:
+                while not self.replies and not self.closed:
+                    self.cond.wait()
+                if not self.replies:
+                    return
+                deadline, data = self.replies.popleft()
+            delay = deadline - monotonic()
+            if delay > 0:
+                sleep(delay)
+            try:
+                self.request.sendall(data)
+            except socket.error:
+                return
+
+    def process(self, line):
+        try:
+            name, args = line.split('(', 1)
+            if not args.endswith(')'):
+                raise ValueError('missing closing parenthesis')
+            args = args[:-1]
+        except ValueError:
+            name, args = line, ''
+        self.mock._record(name)
+        cost = self.mock._cost(name)
+        if cost:
+            sleep(cost)
+        if name not in self.commands:
+            return self.fail(line)
+        try:
+            return getattr(self, name.replace('.', '_'))(args)
+        except Exception as e:
+            logger.debug('mock server failed to process %r: %s', line, e)
+            return self.fail(line)
+
+    def fail(self, line):
+        if self.mock.server_version == 'raspberry-juice':
+            return 'Fail'
+        logger.debug('mock server ignored %r', line)
+
+    # Helpers for argument parsing
+
+    def ints(self, args, count):
+        result = [int(float(i)) for i in args.split(',')]
+        if len(result) != count:
+            raise ValueError('expected %d arguments' % count)
+        return result
+
+    def floats(self, args, count):
+        result = [float(i) for i in args.split(',')]
+        if len(result) != count:
+            raise ValueError('expected %d arguments' % count)
+        return result
+
+    def entity(self, args):
+        player_id, args = (args.split(',', 1) + [''])[:2]
+        return int(player_id), args
+
+    # World commands
+
+    def world_getBlock(self, args):
+        return '%d' % self.mock.world.get_block(*self.ints(args, 3))[0]
+
+    def world_getBlockWithData(self, args):
+        return '%d,%d' % self.mock.world.get_block(*self.ints(args, 3))
+
+    def world_getBlocks(self, args):
+        x1, y1, z1, x2, y2, z2 = self.ints(args, 6)
+        get_block = self.mock.world.get_block
+        return ','.join(
+            '%d' % get_block(x, y, z)[0]
+            for y in range(min(y1, y2), max(y1, y2) + 1)
+            for x in range(min(x1, x2), max(x1, x2) + 1)
+            for z in range(min(z1, z2), max(z1, z2) + 1)
+            )
+
+    def world_setBlock(self, args):
+        values = [int(float(i)) for i in args.split(',')]
+        if len(values) not in (4, 5):
+            raise ValueError('expected 4 or 5 arguments')
+        self.mock.world.set_block(*values)
+
+    def world_setBlocks(self, args):
+        values = [int(float(i)) for i in args.split(',')]
+        if len(values) not in (7, 8):
+            raise ValueError('expected 7 or 8 arguments')
+        self.mock.world.set_blocks(*values)
+
+    def world_getHeight(self, args):
+        return '%d' % self.mock.world.get_height(*self.ints(args, 2))
+
+    def world_getPlayerIds(self, args):
+        with self.mock.world._lock:
+            return '|'.join('%d' % i for i in sorted(self.mock.world._players))
+
+    def world_getPlayerId(self, args):
+        with self.mock.world._lock:
+            for player_id, player in self.mock.world._players.items():
+                if player.name == args:
+                    return '%d' % player_id
+        raise ValueError('unknown player %s' % args)
+
+    def world_setting(self, args):
+        key, value = args.split(',', 1)
+        self.mock.world.settings[key] = int(value)
+
+    def world_checkpoint_save(self, args):
+        self.mock.world.save_checkpoint()
+
+    def world_checkpoint_restore(self, args):
+        self.mock.world.restore_checkpoint()
+
+    def chat_post(self, args):
+        self.mock.world.chat.append(args)
+
+    def camera_mode_setNormal(self, args):
+        pass
+
+    camera_mode_setFixed = camera_mode_setNormal
+    camera_mode_setFollow = camera_mode_setNormal
+    camera_setPos = camera_mode_setNormal
+
+    # Player and entity commands
+
+    def get_pos(self, player_id, args):
+        return _format_vector(
+            self.mock.world.player_pos(player_id), fmt=_format_float)
+
+    def set_pos(self, player_id, args):
+        self.mock.world.move_player(
+            player_id, Vector(*self.floats(args, 3)))
+
+    def get_tile(self, player_id, args):
+        return _format_vector(
+            self.mock.world.player_pos(player_id).floor(), fmt='%d'.__mod__)
+
+    def set_tile(self, player_id, args):
+        self.mock.world.move_player(
+            player_id, Vector(*self.ints(args, 3)))
+
+    def get_rotation(self, player_id, args):
+        return _format_float(self.mock.world._players[player_id].rotation)
+
+    def get_pitch(self, player_id, args):
+        return _format_float(self.mock.world._players[player_id].pitch)
+
+    def get_direction(self, player_id, args):
+        player = self.mock.world._players[player_id]
+        yaw = math.radians(player.rotation)
+        pitch = math.radians(player.pitch)
+        # Adding 0.0 normalizes any negative zeros
+        return _format_vector((
+            -math.sin(yaw) * math.cos(pitch) + 0.0,
+            -math.sin(pitch) + 0.0,
+            math.cos(yaw) * math.cos(pitch) + 0.0,
+            ), fmt=_format_float)
+
+    def player_setting(self, args):
+        key, value = args.split(',', 1)
+        self.mock.world.settings[key] = int(value)
+
+    def player_command(method):
+        def player_method(self, args):
+            return method(self, self.mock.world.host_id, args)
+        return player_method
+
+    def entity_command(method):
+        def entity_method(self, args):
+            return method(self, *self.entity(args))
+        return entity_method
+
+    player_getPos = player_command(get_pos)
+    player_setPos = player_command(set_pos)
+    player_getTile = player_command(get_tile)
+    player_setTile = player_command(set_tile)
+    player_getRotation = player_command(get_rotation)
+    player_getPitch = player_command(get_pitch)
+    player_getDirection = player_command(get_direction)
+    entity_getPos = entity_command(get_pos)
+    entity_setPos = entity_command(set_pos)
+    entity_getTile = entity_command(get_tile)
+    entity_setTile = entity_command(set_tile)
+    entity_getRotation = entity_command(get_rotation)
+    entity_getPitch = entity_command(get_pitch)
+    entity_getDirection = entity_command(get_direction)
+    del player_command, entity_command
+
+    # Event commands
+
+    def events_clear(self, args):
+        self.mock.world.clear_events()
+
+    def events_block_hits(self, args):
+        return '|'.join(
+            '%s,%d,%d' % (
+                _format_vector(pos, fmt='%d'.__mod__), face, player_id)
+            for pos, face, player_id in self.mock.world.pop_hits()
+            )
+
+    def events_chat_posts(self, args):
+        return '|'.join(
+            '%d,%s' % (player_id, message)
+            for message, player_id in self.mock.world.pop_posts()
+            )
+
+
+class _MockTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockServer(object):
+    """
+    An in-process server emulating Minecraft Pi or Raspberry Juice.
+
+    The server listens on *host* and *port* (the default of 0 picks a free
+    port; query :attr:`address` to find out which) and serves each connection
+    from a background thread. It is started by :meth:`start` and stopped by
+    :meth:`close`; it can also be used as a context manager which does both.
+
+    The *server_version* parameter selects which server to emulate; it must be
+    one of ``'minecraft-pi'`` or ``'raspberry-juice'``. This affects the set of
+    supported commands and the response to unknown ones (Minecraft Pi ignores
+    them while Raspberry Juice answers "Fail"), so that the library's version
+    detection and fallback paths are exercised exactly as they would be
+    against the real thing.
+
+    The *world* parameter may be used to provide a pre-populated
+    :class:`MockWorld`; if omitted an empty one is constructed.
+
+    The *latency* parameter specifies the delay (in seconds) between a command
+    being received and its reply being sent. Replies to pipelined commands are
+    delayed independently, as they would be by a network. The *command_cost*
+    parameter specifies the time (in seconds) that the server spends
+    processing each command, during which no other commands on that
+    connection are handled. It may be a number applying to all commands, or a
+    dictionary mapping command names (e.g. ``'world.setBlock'``) to costs;
+    commands missing from the dictionary cost nothing.
+
+    .. attribute:: counts
+
+        A :class:`~collections.Counter` of the number of times each command
+        (by name) has been received across all connections.
+    """
+
+    def __init__(
+            self, host='127.0.0.1', port=0, server_version='raspberry-juice',
+            world=None, latency=0.0, command_cost=0.0):
+        if server_version not in SERVER_VERSIONS:
+            raise ValueError('invalid server_version: %s' % server_version)
+        self.server_version = server_version
+        self.world = MockWorld() if world is None else world
+        self.latency = latency
+        self.command_cost = command_cost
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._server = _MockTCPServer((host, port), _MockHandler)
+        self._server.mock = self
+        self._thread = None
+
+    def __repr__(self):
+        return '<MockServer %s at %s:%d>' % (
+            self.server_version, self.address[0], self.address[1])
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    @property
+    def address(self):
+        """
+        The ``(host, port)`` tuple that the server is listening on. This can
+        be passed straight to :class:`~picraft.world.World`::
+
+            world = World(*server.address)
+        """
+        return self._server.server_address[:2]
+
+    def _record(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _cost(self, name):
+        if isinstance(self.command_cost, dict):
+            return self.command_cost.get(name, 0.0)
+        return self.command_cost
+
+    def start(self):
+        """
+        Start serving connections in a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def disconnect(self):
+        """
+        Forcibly close all client connections; the server continues to accept
+        new ones. This is useful for testing how clients cope with a server
+        going away.
+        """
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+    def close(self):
+        """
+        Stop serving connections, close all client connections and the
+        listening socket.
+        """
+        self.disconnect()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
@@ -71,7 +71,7 @@ str = type('')
 
 
 from .exc import NotSupported
-from .connection import Connection
+from .connection import Connection, ConnectionPool, _encode_get_height
 from .player import HostPlayer, Players
 from .block import Blocks
 from .vector import Vector, vector_range
@@ -86,7 +86,13 @@ class World(object):
     of this class, optionally specifying the *host* and *port* of the server
     (which default to "localhost" and 4711 respectively). Afterward, the
     instance can be used to query and manipulate the minecraft world of the
-    connected game.
+    connected game. The *timeout*, *ignore_errors*, *pipeline*, *coalesce*,
+    *server_version*, *version_cache*, and *reconnect* parameters are passed
+    to the :class:`~picraft.connection.Connection` constructor. If
+    *pool_size* (which defaults to 1) is greater than 1, a
+    :class:`~picraft.connection.ConnectionPool` of that many connections is
+    constructed instead, giving each thread (e.g. threaded event handlers) its
+    own connection to the server.
 
     The :meth:`say` method can be used to send commands to the console, while
     the :attr:`player` attribute can be used to manipulate or query the status
@@ -103,8 +109,19 @@ class World(object):
 
     def __init__(
             self, host='localhost', port=4711, timeout=1.0,
-            ignore_errors=True):
-        self._connection = Connection(host, port, timeout, ignore_errors)
+            ignore_errors=True, pipeline=False, pool_size=1, coalesce=None,
+            server_version=None, version_cache=None, reconnect=None):
+        if pool_size > 1:
+            self._connection = ConnectionPool(
+                host, port, pool_size, timeout, ignore_errors,
+                pipeline=pipeline, coalesce=coalesce,
+                server_version=server_version, version_cache=version_cache,
+                reconnect=reconnect)
+        else:
+            self._connection = Connection(
+                host, port, timeout, ignore_errors, pipeline=pipeline,
+                coalesce=coalesce, server_version=server_version,
+                version_cache=version_cache, reconnect=reconnect)
         self._player = HostPlayer(self._connection)
         self._players = Players(self._connection)
         self._blocks = Blocks(self._connection)
@@ -275,15 +292,43 @@ class World(object):
             [<Block "grass" id=2 data=0>,<Block "grass" id=2 data=0>,<Block "grass" id=2 data=0>]
             >>> world.blocks[d.keys()] = d.values()
 
+        Scanning large regions as lists of :class:`~picraft.block.Block`
+        objects consumes a lot of memory. Setting the ``compact`` attribute
+        causes slice queries to return a :class:`~picraft.block.BlockArray`
+        which stores three bytes per block instead::
+
+            >>> world.blocks.compact = True
+            >>> world.blocks[Vector():Vector(100, 50, 100)]
+            <BlockArray vrange=vector_range(Vector(x=100, y=50, z=100), order='zxy')>
+
+        If NumPy is installed, :meth:`~picraft.block.BlockArray.to_numpy`
+        converts the result into ``(y, x, z)`` arrays of ids and data without
+        copying. Likewise, a NumPy array of block ids (or a
+        :class:`~picraft.block.BlockArray`) can be assigned to a slice::
+
+            >>> region = slice(Vector(), Vector(100, 50, 100))
+            >>> ids, data = world.blocks[region].to_numpy()
+            >>> ids[ids == 3] = 1
+            >>> world.blocks[region] = ids
+
         .. warning::
 
             Querying or setting sequences of blocks can be extremely slow as a
             network transaction must be executed for each individual block.
             When setting a slice of blocks, this can be speeded up by
             specifying a single :class:`~picraft.block.Block` in which case one
-            network transaction will occur to set all blocks in the slice.  The
-            Raspberry Juice server also supports querying sequences of blocks
-            with a single command (picraft will automatically use this).
+            network transaction will occur to set all blocks in the slice.
+            When setting a slice to a sequence of blocks, or a collection of
+            vectors to a single block, picraft merges regions of identical
+            blocks into cuboids and sets each with a single command, so
+            largely uniform structures are quick to build.
+            The Raspberry Juice server also supports querying sequences of
+            blocks with a single command (picraft will automatically use this
+            for slices). Note that this command does not report the *data*
+            component of blocks, which will always be 0. Where only block ids
+            are required, :meth:`~picraft.block.Blocks.get_ids` uses the same
+            command to query densely clustered vectors within arbitrary
+            collections.
             Additionally, :meth:`~picraft.connection.Connection.batch_start`
             can be used to speed up setting sequences of blocks (though not
             querying).
@@ -406,14 +451,16 @@ class WorldHeight(object):
 
     def __getitem__(self, index):
         if isinstance(index, slice):
+            vrange = vector_range(index.start, index.stop)
             return [
-                Vector(v.x, int(self._connection.transact(
-                    'world.getHeight(%d,%d)' % (v.x, v.z))), v.z)
-                for v in vector_range(index.start, index.stop)
+                Vector(v.x, int(y), v.z)
+                for v, y in zip(vrange, self._connection.transact_many(
+                    _encode_get_height(v.x, v.z)
+                    for v in vrange))
                 ]
         else:
             return Vector(index.x, int(self._connection.transact(
-                'world.getHeight(%d,%d)' % (index.x, index.z))), index.z)
+                _encode_get_height(index.x, index.z))), index.z)
 
 
 class Checkpoint(object):